@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+
+from pyforc.Particle.Hysteron import Hysteron
+from pyforc.Particle.SwParticle import SwParticle
+from pyforc.Particle.AbstractTwoBranchesParticle import AbstractTwoBranchesParticle
+from pyforc.Matter.ManyParticlesMatter import ManyParticlesMatter
+from pyforc.Matter.HysteronEnsembleMatter import HysteronEnsembleMatter
+from pyforc.ExperimentProcessor.PikeFORC import PikeFORC
+
+
+class ForcBenchmark:
+    """Timings of the particles, matters and FORC phases with fixed random seeds, saved as JSON
+
+    Every case is run `repeats` times and the best time is kept. Units are the work done by one run of a case:
+    applied fields, particle updates or grid points, so that the throughput can be compared across sizes.
+    """
+
+    repeats = 3
+    particle_fields = 2000
+    ensemble_sizes = (100, 1000, 10000, 100000)
+    forc_sizes = (21, 51, 101)
+    distribution_sizes = (51, 101, 201)
+    smoothing_factors = (2, 4, 6)
+
+    def __init__(self, quick: bool = False, seed: int = 0):
+        self.seed = seed
+        if quick:
+            self.repeats = 1
+            self.particle_fields = 200
+            self.ensemble_sizes = (100, 1000)
+            self.forc_sizes = (21,)
+            self.distribution_sizes = (51,)
+            self.smoothing_factors = (2, 4)
+
+    def run(self, log=None) -> dict:
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            for name, parameters, case, units in self._cases(directory):
+                seconds = min(self._time(case) for _ in range(self.repeats))
+                results.append({'name': name, 'parameters': parameters, 'seconds': seconds, 'units': units,
+                                'throughput': units / seconds if seconds > 0 else None})
+                if log is not None:
+                    log(self._describe(results[-1]))
+
+        return {'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                                'machine': platform.machine(), 'processor': platform.processor(),
+                                'repeats': self.repeats, 'seed': self.seed},
+                'results': results}
+
+    @staticmethod
+    def _time(case) -> float:
+        work = case()
+        start = time.perf_counter()
+        work()
+        return time.perf_counter() - start
+
+    def _cases(self, directory: str):
+        # every case is a function preparing a fresh state and returning the work to time
+        random = np.random.RandomState(self.seed)
+        fields = np.sin(np.linspace(0, 6 * np.pi, self.particle_fields)) * 1.5
+
+        def apply_fields(particle_factory):
+            def case():
+                particle = particle_factory()
+                return lambda: [particle.apply_field(h) for h in fields]
+            return case
+
+        data_file = self._two_branches_data_file(directory)
+        particles = (('Hysteron', lambda: Hysteron(0.5, -0.3)), ('SwParticle', lambda: SwParticle(0.7)),
+                     ('AbstractTwoBranchesParticle', lambda: AbstractTwoBranchesParticle(data_file, 0.6, 0.1)))
+        for name, particle_factory in particles:
+            yield 'particle.apply_field', {'particle': name, 'fields': len(fields)}, apply_fields(particle_factory), \
+                len(fields)
+
+        for n in self.ensemble_sizes:
+            alpha = random.uniform(0, 1, n)
+            beta = alpha - random.uniform(0, 1, n)
+
+            def case(alpha=alpha, beta=beta):
+                matter = ManyParticlesMatter([Hysteron(a, b) for a, b in zip(alpha, beta)])
+                return lambda: [matter.magnetize(h) for h in (0.8, -0.4, 0.2)]
+            yield 'ManyParticlesMatter.magnetize', {'particles': n}, case, 3 * n
+
+            def case(alpha=alpha, beta=beta):
+                matter = HysteronEnsembleMatter(alpha, beta)
+                return lambda: matter.magnetize_sweep(fields)
+            yield 'HysteronEnsembleMatter.magnetize_sweep', {'particles': n, 'fields': len(fields)}, case, len(fields)
+
+        psi = random.uniform(0, np.pi, 50)
+        alpha = random.uniform(0, 1, 10000)
+        beta = alpha - random.uniform(0, 1, 10000)
+        for N in self.forc_sizes:
+            def case(N=N):
+                forc = PikeFORC(1.0, -0.5, 0.5, ManyParticlesMatter([SwParticle(a) for a in psi]), directory, N=N)
+                return forc.magnetization_forc
+            yield 'PikeFORC.magnetization_forc', {'matter': 'ManyParticlesMatter', 'particles': len(psi), 'N': N}, \
+                case, N * N
+
+            def case(N=N):
+                forc = PikeFORC(1.0, -0.5, 0.5, HysteronEnsembleMatter(alpha, beta), directory, N=N)
+                return forc.magnetization_forc
+            yield 'PikeFORC.magnetization_forc', {'matter': 'HysteronEnsembleMatter', 'particles': len(alpha),
+                                                  'N': N}, case, N * N
+
+        for N in self.distribution_sizes:
+            for SF in self.smoothing_factors:
+                def case(N=N, SF=SF):
+                    forc = PikeFORC(1.0, -0.5, 0.5, HysteronEnsembleMatter(alpha, beta), directory, N=N, SF=SF)
+                    forc.magnetization_forc()
+                    return forc.calculate_forc_distribution
+                yield 'PikeFORC.calculate_forc_distribution', {'N': N, 'SF': SF}, case, N * N
+
+    @staticmethod
+    def _two_branches_data_file(directory: str) -> str:
+        h = np.linspace(0.02, 1.2, 120)
+        path = os.path.join(directory, 'two_branches.txt')
+        rows = [(branch, x, y, 0.0, x * y) for branch, m in ((1, np.tanh(3 * h)), (-1, np.tanh(3 * h) - 0.5))
+                for x, y in zip(h, m)]
+        np.savetxt(path, np.array(rows), header='branch\th\tm\tx\tq', comments='')
+        return path
+
+    @staticmethod
+    def key(result: dict) -> str:
+        return result['name'] + json.dumps(result['parameters'], sort_keys=True)
+
+    @staticmethod
+    def _describe(result: dict) -> str:
+        parameters = ', '.join(k + '=' + str(v) for k, v in sorted(result['parameters'].items()))
+        return '{:<40} {:<60} {:10.4f} s'.format(result['name'], parameters, result['seconds'])
+
+    @classmethod
+    def compare(cls, baseline: dict, current: dict, threshold: float = 0.2, min_seconds: float = 0.001) -> list:
+        """(result, baseline seconds, ratio) of the cases slower than the baseline by more than the threshold
+
+        Slowdowns of less than min_seconds are timer noise and are not flagged.
+        """
+        baseline_seconds = {cls.key(r): r['seconds'] for r in baseline['results']}
+        regressions = []
+        for result in current['results']:
+            seconds = baseline_seconds.get(cls.key(result))
+            if seconds is None or seconds <= 0 or result['seconds'] - seconds < min_seconds:
+                continue
+            if result['seconds'] > seconds * (1 + threshold):
+                regressions.append((result, seconds, result['seconds'] / seconds))
+        return regressions
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of the FORC simulation')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks and save the timings as JSON')
+    run_parser.add_argument('output')
+    run_parser.add_argument('--quick', action='store_true', help='small sizes and a single repeat')
+    run_parser.add_argument('--seed', type=int, default=0)
+    compare_parser = commands.add_parser('compare', help='flag cases slower than in a saved baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative slowdown')
+    compare_parser.add_argument('--min-seconds', type=float, default=0.001, help='allowed absolute slowdown')
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == 'run':
+        results = ForcBenchmark(arguments.quick, arguments.seed).run(print)
+        with open(arguments.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    with open(arguments.baseline) as f:
+        baseline = json.load(f)
+    with open(arguments.current) as f:
+        current = json.load(f)
+    regressions = ForcBenchmark.compare(baseline, current, arguments.threshold, arguments.min_seconds)
+    for result, seconds, ratio in regressions:
+        print('REGRESSION ' + ForcBenchmark._describe(result) + '  baseline {:.4f} s  x{:.2f}'.format(seconds, ratio))
+    if len(regressions) == 0:
+        print('No regressions')
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
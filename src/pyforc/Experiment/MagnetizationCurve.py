@@ -0,0 +1,23 @@
+import numpy as np
+
+
+class MagnetizationCurve:
+    def load_from_h_m_values_file(self, path_to_data_file, plot: bool = True):
+        with open(path_to_data_file) as f:
+            col_names = f.readline().rstrip('\n').split("\t")
+            data = np.loadtxt(f, ndmin=2)
+
+        self.col_names = col_names
+        self.data = data
+        if not plot:
+            return data
+
+        import matplotlib.pyplot as plt
+        fig = plt.figure()
+        ax = fig.add_subplot(111)
+        ax.plot(data[:, 0], data[:, 1])
+        ax.set_xlabel(col_names[0])
+        ax.set_ylabel(col_names[1])
+        ax.grid(axis='both')
+        plt.show()
+        return data
@@ -0,0 +1,93 @@
+import itertools
+import numpy as np
+
+
+class MeasuredForcData:
+    """A measured FORC file read in chunks of lines and split into reversal curves on the fly
+
+    The file has a header line and whitespace separated columns with the field and the magnetization. A reversal
+    curve ends at a blank line or where the field decreases; curves of a single point (e.g. calibration points)
+    are skipped.
+    """
+
+    chunk_lines = 100000
+
+    def __init__(self, path_to_data_file: str, h_column: int = 0, m_column: int = 1, skiprows: int = 1,
+                 chunk_lines: int = None):
+        self.path_to_data_file = path_to_data_file
+        self.h_column = h_column
+        self.m_column = m_column
+        self.skiprows = skiprows
+        if chunk_lines is not None:
+            self.chunk_lines = chunk_lines
+
+    def reversal_curves(self):
+        """Yields (hr, h, m) of every reversal curve in the order of the file"""
+        h_tail = np.zeros(0)
+        m_tail = np.zeros(0)
+        with open(self.path_to_data_file) as f:
+            for _ in range(self.skiprows):
+                f.readline()
+
+            while True:
+                lines = list(itertools.islice(f, self.chunk_lines))
+                if len(lines) == 0:
+                    break
+
+                blank = np.array([len(line.strip()) == 0 for line in lines])
+                values = np.zeros((0, 2))
+                if not np.all(blank):
+                    values = np.loadtxt([line for line in lines if line.strip()],
+                                        usecols=(self.h_column, self.m_column), ndmin=2)
+                # a point starts a new curve if it follows a blank line or a higher field
+                after_blank = np.cumsum(blank)[~blank]
+                follows_blank = np.diff(np.concatenate(([0], after_blank))) > 0
+
+                h = np.concatenate((h_tail, values[:, 0]))
+                m = np.concatenate((m_tail, values[:, 1]))
+                if len(h) == 0:
+                    # only blank lines after a closed curve, the tail is already empty
+                    continue
+                starts = np.concatenate((np.zeros(len(h_tail), dtype=bool), follows_blank))
+                starts[1:] |= np.diff(h) < 0
+                starts[0] = True
+
+                bounds = np.nonzero(starts)[0]
+                for first, last in zip(bounds[:-1], bounds[1:]):
+                    if last - first > 1:
+                        yield h[first], h[first:last], m[first:last]
+
+                # the last curve may go on in the next chunk; a blank line at the end of the chunk closes it
+                h_tail = h[bounds[-1]:]
+                m_tail = m[bounds[-1]:]
+                if blank[-1]:
+                    if len(h_tail) > 1:
+                        yield h_tail[0], h_tail, m_tail
+                    h_tail = np.zeros(0)
+                    m_tail = np.zeros(0)
+
+        if len(h_tail) > 1:
+            yield h_tail[0], h_tail, m_tail
+
+    def fill_forc_grid(self, forc) -> None:
+        """Regrids the reversal curves onto the Hr/H mesh of a PikeFORC and stores them in its Mgrid
+
+        Every curve is interpolated linearly in H, with its first value held for H below its reversal field, and
+        rows of the mesh between two consecutive curves are interpolated linearly in Hr. Only two curves are kept
+        in memory at a time, so the curves should come ordered by the reversal field, as measured.
+        """
+        previous_hr = None
+        previous_row = None
+        for hr, h, m in self.reversal_curves():
+            row = np.interp(forc.H, h, m, right=np.nan)
+            if previous_row is not None and hr != previous_hr:
+                low, high = min(hr, previous_hr), max(hr, previous_hr)
+                rows = np.nonzero((forc.Hr >= low) & (forc.Hr <= high))[0]
+                if len(rows) > 0:
+                    weight = ((forc.Hr[rows] - previous_hr) / (hr - previous_hr))[:, None]
+                    block = (1 - weight) * previous_row + weight * row
+                    block[forc.H[None, :] < forc.Hr[rows, None]] = np.nan
+                    forc.write_magnetization_rows(rows, block)
+            previous_hr = hr
+            previous_row = row
+        forc.flush()
@@ -0,0 +1,121 @@
+import os
+import numpy as np
+from pyforc.ExperimentProcessor.PikeFORC import PikeFORC, _simulate_forc_curve
+
+
+class AdaptiveForcRefinement:
+    """The FORC distribution of a PikeFORC computed on its grid only where the distribution lives
+
+    A coarse grid with every coarse_factor-th reversal and applied field is simulated and fitted first. Where |P|
+    or the magnitude of its gradient on that grid reaches the threshold (a fraction of its maximum within the
+    Hc-Hu window), the distribution is refined: only the points of the fine reversal curves used by the local
+    fits of the refined points are simulated, then fitted. PgridHHr of the forc gets the refined distribution
+    at the points marked in `refined` and the coarse one interpolated elsewhere; resample() evaluates this
+    multi-resolution distribution on any other grid.
+    """
+
+    def __init__(self, forc: PikeFORC, coarse_factor: int = 4, threshold: float = 0.05,
+                 gradient_threshold: float = 0.1):
+        if coarse_factor < 2 or (len(forc.Hr) - 1) % coarse_factor != 0:
+            raise Exception('N - 1 should be a multiple of the coarse factor, which should be at least 2')
+
+        self.forc = forc
+        self.coarse_factor = coarse_factor
+        self.threshold = threshold
+        self.gradient_threshold = gradient_threshold
+        self.coarse = None
+        self.refined = None
+        self.simulated_points = 0  # points of the fine grid simulated in addition to the coarse grid
+
+    def run(self) -> None:
+        forc = self.forc
+        self.coarse = PikeFORC(forc.maxHc, forc.minHu, forc.maxHu, forc.matter,
+                               os.path.dirname(forc.FolderForResults_common),
+                               N=(len(forc.Hr) - 1) // self.coarse_factor + 1,
+                               SF=max(2, int(round(forc.SF / self.coarse_factor))), cache=forc.cache)
+        self.coarse.magnetization_forc()
+        self.coarse.calculate_forc_distribution()
+
+        self.refined = self._refined_points()
+        with forc._phase('magnetization_forc'):
+            self._simulate_points(self._needed_points())
+        with forc._phase('calculate_forc_distribution'):
+            self._fit_refined_points()
+
+    def _refined_points(self) -> np.ndarray:
+        import scipy.ndimage
+        p = self.coarse.PgridHcHu
+        significant = np.zeros(p.shape, dtype=bool)
+        if np.any(~np.isnan(p)):
+            # the gradient is NaN next to the border of the window and of the measured points, it is not flagged
+            gradient = np.nan_to_num(np.hypot(*np.gradient(p)), nan=0.0)
+            significant = (np.nan_to_num(np.abs(p), nan=0.0) >= self.threshold * np.nanmax(np.abs(p))) | (
+                (gradient >= self.gradient_threshold * np.max(gradient)) & (gradient > 0))
+            significant = scipy.ndimage.binary_dilation(significant, np.ones((3, 3), dtype=bool))
+
+        # every fine point takes the flag of the nearest coarse point
+        rows = np.rint(np.arange(len(self.forc.Hr)) / self.coarse_factor).astype(int)
+        columns = np.minimum(np.rint(np.arange(len(self.forc.H)) / self.coarse_factor).astype(int),
+                             len(self.coarse.H) - 1)
+        return significant[rows][:, columns] & (self.forc.H[None, :] >= self.forc.Hr[:, None])
+
+    def _needed_points(self) -> np.ndarray:
+        import scipy.ndimage
+        # the points in the fitting windows of the refined points, the first reversal curve is never simulated
+        window = 2 * self.forc.SF + 1
+        needed = scipy.ndimage.binary_dilation(self.refined, np.ones((window, window), dtype=bool))
+        needed &= self.forc.H[None, :] >= self.forc.Hr[:, None]
+        needed[0] = False
+        return needed
+
+    def _simulate_points(self, needed: np.ndarray) -> None:
+        forc = self.forc
+        if forc.matter.preisach_thresholds() is not None:
+            # the whole grid of an ensemble of hysterons is cheaper than any part of it simulated curve by curve
+            forc.magnetization_forc()
+            return
+
+        f = self.coarse_factor
+        coarse_m = self.coarse.get_magnetization_rows()
+        shared = np.arange(0, min(len(forc.H), f * len(self.coarse.H)), f)
+        for i in np.nonzero(np.any(needed, axis=1))[0][::-1]:
+            row = np.full(len(forc.H), np.nan)
+            if i % f == 0:
+                row[shared] = coarse_m[i // f, :len(shared)]
+
+            to_simulate = np.nonzero(needed[i] & np.isnan(row))[0]
+            if len(to_simulate) > 0:
+                row[to_simulate] = _simulate_forc_curve(forc.matter, forc.Hr[i], forc.H[to_simulate])
+            self.simulated_points += len(to_simulate)
+            forc.write_magnetization_rows([i], row[None, :])
+        forc.flush()
+
+    def _fit_refined_points(self) -> None:
+        forc = self.forc
+        p = np.full((len(forc.Hr), len(forc.H)), np.nan)
+        rows = np.nonzero(np.any(self.refined, axis=1))[0]
+        if len(rows) > 0:
+            rows_per_block = forc._rows_per_block(len(forc.H) * (2 * forc.SF) ** 2)
+            for first_row in range(rows[0], rows[-1] + 1, rows_per_block):
+                last_row = min(first_row + rows_per_block, rows[-1] + 1)
+                p[first_row:last_row] = forc._get_forc_distribution_rows(first_row, last_row)
+
+        p = np.where(self.refined, p, self._interpolate(self.coarse.Hr, self.coarse.H, self.coarse.PgridHHr,
+                                                        forc.Hr, forc.H))
+        forc.write_distribution_rows(np.arange(len(forc.Hr)), p)
+        forc.flush()
+
+    @staticmethod
+    def _interpolate(Hr: np.ndarray, H: np.ndarray, p, new_Hr: np.ndarray, new_H: np.ndarray) -> np.ndarray:
+        from scipy.interpolate import RegularGridInterpolator
+        interpolator = RegularGridInterpolator((Hr, H), np.array(p, dtype=float), bounds_error=False,
+                                               fill_value=np.nan)
+        return interpolator(tuple(np.meshgrid(new_Hr, new_H, indexing='ij')))
+
+    def resample(self, Hr: np.ndarray, H: np.ndarray) -> np.ndarray:
+        """The distribution on the grid of the given reversal and applied fields: the refined one interpolated
+        where it covers the whole cell, the coarse one elsewhere"""
+        fine = np.where(self.refined, np.array(self.forc.PgridHHr, dtype=float), np.nan)
+        p = self._interpolate(self.forc.Hr, self.forc.H, fine, Hr, H)
+        coarse = self._interpolate(self.coarse.Hr, self.coarse.H, self.coarse.PgridHHr, Hr, H)
+        return np.where(np.isnan(p), coarse, p)
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import numpy as np
+
+
+class ForcCache:
+    """An on-disk cache of simulated FORC grids keyed by a hash of the matter configuration and the field grid
+
+    Every entry is a .npy file named <key>.M.npy for Mgrid or <key>.P<SF>.npy for the FORC distribution of a
+    smoothing factor. The modification time of a file is its last use, the least recently used files are
+    removed once the cache grows over max_bytes. An entry larger than max_bytes on its own is not stored.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2 ** 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+    @staticmethod
+    def key(matter, Hr: np.ndarray, H: np.ndarray, dtype=np.float64) -> str:
+        """The key of the grids of the matter on the Hr/H mesh, stored with the given dtype"""
+        digest = hashlib.sha1(matter.fingerprint().encode())
+        digest.update(np.ascontiguousarray(Hr, dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(H, dtype=float).tobytes())
+        digest.update(np.dtype(dtype).str.encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str, SF: int = None) -> str:
+        return os.path.join(self.directory, key + ('.M' if SF is None else '.P' + str(SF)) + '.npy')
+
+    def get(self, key: str, SF: int = None) -> (np.ndarray, None):
+        """Mgrid stored under the key, or PgridHHr if a smoothing factor is given, None if there is none"""
+        path = self._path(key, SF)
+        try:
+            grid = np.load(path)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # evicted by another process meanwhile, the grid is loaded already
+            pass
+        return grid
+
+    def put(self, key: str, grid, SF: int = None) -> None:
+        path = self._path(key, SF)
+        # written under a temporary name first, so that a reader never sees a partial file
+        temporary_path = path + '.' + str(os.getpid()) + '.tmp'
+        with open(temporary_path, 'wb') as f:
+            np.save(f, np.asarray(grid))
+        if os.path.getsize(temporary_path) > self.max_bytes:
+            # an entry that does not fit would only evict everything else and then itself
+            os.remove(temporary_path)
+            return
+        os.replace(temporary_path, path)
+        self._evict()
+
+    def invalidate(self, key: str = None) -> None:
+        """Removes all entries of the key (Mgrid and every PgridHHr), or the whole cache if no key is given"""
+        for name in self._entries():
+            if key is None or name.startswith(key + '.'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _entries(self) -> list:
+        return [name for name in os.listdir(self.directory) if name.endswith('.npy')]
+
+    def _evict(self) -> None:
+        entries = []
+        for name in self._entries():
+            try:
+                status = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime, status.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
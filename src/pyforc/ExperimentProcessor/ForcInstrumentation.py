@@ -0,0 +1,111 @@
+import contextlib
+import json
+import time
+import numpy as np
+
+
+class _CallCounter:
+    # Replaces a method on one instance and counts its calls (and the fields of sweeps) in a shared dict. Both
+    # are picklable, so the copies of a matter sent to worker processes keep counting there.
+    def __init__(self, method, counts: dict, name: str):
+        self.method = method
+        self.counts = counts
+        self.name = name
+
+    def __call__(self, *args):
+        self.counts[self.name] = self.counts.get(self.name, 0) + 1
+        if self.name.endswith('magnetize_sweep'):
+            self.counts[self.name + ' fields'] = self.counts.get(self.name + ' fields', 0) + len(args[0])
+        return self.method(*args)
+
+
+class ForcInstrumentation:
+    """Opt-in timings and call counts of a PikeFORC run, written as a JSON report after every phase
+
+    Phases record wall and CPU time (the CPU time of this process only, worker processes are not included),
+    rows the wall time of simulating each reversal curve, counts the calls of matter and particle methods and
+    the surface fits of the FORC distribution.
+    """
+
+    matter_methods = ('magnetize', 'magnetize_sweep', 'saturate_to_positive', 'saturate_to_negative')
+    particle_methods = ('apply_field', 'magnetize_sweep', 'set_up', 'set_down')
+
+    def __init__(self, report_path: str = None):
+        self.report_path = report_path
+        self.phases = {}
+        self.row_seconds = {}
+        self.counts = {}
+        self._active_phases = set()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        # a phase entered again from within itself is timed once, by the outermost entry
+        if name in self._active_phases:
+            yield
+            return
+
+        self._active_phases.add(name)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            totals['wall'] += time.perf_counter() - wall
+            totals['cpu'] += time.process_time() - cpu
+            totals['calls'] += 1
+            self._active_phases.discard(name)
+            if len(self._active_phases) == 0 and self.report_path is not None:
+                self.write_report(self.report_path)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def add_counts(self, counts: dict) -> None:
+        for name, n in counts.items():
+            self.count(name, n)
+
+    def add_row_times(self, rows, seconds) -> None:
+        for i, s in zip(rows, seconds):
+            self.row_seconds[int(i)] = float(s)
+
+    @classmethod
+    def install_counters(cls, matter) -> dict:
+        """Counts the calls of the methods of the matter and its particles until remove_counters"""
+        counts = {}
+        targets = [('matter', matter)]
+        if hasattr(matter, 'particles'):
+            targets += [('particle', p) for p in matter.particles]
+        elif hasattr(matter, 'particle'):
+            targets.append(('particle', matter.particle))
+
+        for kind, target in targets:
+            for method in cls.matter_methods if kind == 'matter' else cls.particle_methods:
+                if hasattr(target, method):
+                    setattr(target, method, _CallCounter(getattr(target, method), counts, kind + '.' + method))
+        matter.call_counts = counts
+        return counts
+
+    @classmethod
+    def remove_counters(cls, matter) -> None:
+        targets = [matter] + list(getattr(matter, 'particles', [])) + (
+            [matter.particle] if hasattr(matter, 'particle') else [])
+        for target in targets:
+            for method in cls.matter_methods + cls.particle_methods:
+                if isinstance(target.__dict__.get(method), _CallCounter):
+                    del target.__dict__[method]
+        matter.__dict__.pop('call_counts', None)
+
+    def report(self) -> dict:
+        seconds = np.array(list(self.row_seconds.values()))
+        rows = {'count': len(seconds)}
+        if len(seconds) > 0:
+            slowest = max(self.row_seconds, key=self.row_seconds.get)
+            rows.update({'total': float(np.sum(seconds)), 'mean': float(np.mean(seconds)),
+                         'max': float(np.max(seconds)), 'slowest_row': slowest,
+                         'seconds_by_row': {str(i): s for i, s in sorted(self.row_seconds.items())}})
+        return {'phases': self.phases, 'rows': rows, 'counts': self.counts}
+
+    def write_report(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
@@ -0,0 +1,129 @@
+import concurrent.futures
+import datetime
+import os
+import numpy as np
+
+
+class ForcRenderer:
+    """Draws the diagrams of a PikeFORC, either interactively with pyplot or headless into image files
+
+    A headless renderer uses the non-interactive Agg canvas without touching the pyplot backend, reuses one
+    figure per kind of diagram and never blocks on plt.show(). With background=True the images are drawn and
+    saved by a worker thread from a copy of the data, so the next simulation does not wait for them; the draw
+    methods then return a future of the saved path. A PikeFORC with instrumentation waits for it within its
+    plotting phase, so that the phase reports the time of the drawing.
+    """
+
+    def __init__(self, headless: bool = False, background: bool = False, image_format: str = 'png', dpi: int = 100):
+        if background and not headless:
+            raise Exception('Only a headless renderer can draw in the background')
+
+        self.headless = headless
+        self.image_format = image_format
+        self.dpi = dpi
+        self.figures = {}
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1) if background else None
+
+    def close(self) -> None:
+        """Waits for the images still being drawn in the background"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def draw_forcs(self, forc):
+        m = np.array(forc.get_magnetization_rows(), dtype=float)
+        path = os.path.join(forc.FolderForResults_with_time, 'forcs.' + self.image_format)
+        return self._render('forcs', self._draw_forcs, (forc.H.copy(), forc.Hr.copy(), m), path)
+
+    def draw_magnetization_forc(self, forc):
+        m = np.array(forc.get_magnetization_rows(), dtype=float)
+        path = os.path.join(forc.FolderForResults_with_time, 'magnetization_forc.' + self.image_format)
+        return self._render('magnetization_forc', self._draw_magnetization_forc, (forc.Hgrid, forc.Hrgrid, m),
+                            path)
+
+    def draw_forc_diagram_hc_hu(self, forc):
+        folder = os.path.join(forc.FolderForResults_common, 'countur_FORC_diagram_in_Hc_Hu')
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        # the interactive diagram has always been saved as jpg
+        image_format = self.image_format if self.headless else 'jpg'
+        path = os.path.join(folder, datetime.datetime.now().strftime("%H_%M_%S") + '.' + image_format)
+        limits = (forc.minHc, forc.maxHc, forc.minHu, forc.maxHu)
+        return self._render('forc_diagram_hc_hu', self._draw_forc_diagram_hc_hu,
+                            (forc.Hcgrid, forc.Hugrid, forc.PgridHcHu, limits), path, always_save=True)
+
+    def _render(self, name: str, draw, data: tuple, path: str, always_save: bool = False):
+        if not self.headless:
+            import matplotlib.pyplot as plt
+            fig = plt.figure()
+            draw(fig, *data)
+            if always_save:
+                fig.savefig(path)
+            plt.show()
+            return path
+
+        if self.executor is not None:
+            return self.executor.submit(self._render_headless, name, draw, data, path)
+        return self._render_headless(name, draw, data, path)
+
+    def _render_headless(self, name: str, draw, data: tuple, path: str) -> str:
+        fig = self.figures.get(name)
+        if fig is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+            fig = Figure()
+            FigureCanvasAgg(fig)
+            self.figures[name] = fig
+        fig.clf()
+        draw(fig, *data)
+        fig.savefig(path, dpi=self.dpi)
+        return path
+
+    @staticmethod
+    def _draw_forcs(fig: 'Figure', H: np.ndarray, Hr: np.ndarray, m: np.ndarray) -> None:
+        from matplotlib.collections import LineCollection
+        # one polyline per reversal curve, from its reversal field up
+        segments = []
+        for i in range(len(Hr)):
+            measured = (H >= Hr[i]) & ~np.isnan(m[i])
+            if np.count_nonzero(measured) > 0:
+                segments.append(np.column_stack((H[measured], m[i, measured])))
+
+        ax = fig.add_subplot(111)
+        ax.add_collection(LineCollection(segments, colors='b'))
+        ax.autoscale()
+        ax.set_title("First order reversal curves")
+        ax.set_xlabel('H')
+        ax.set_ylabel('M')
+        ax.grid(which='both')
+
+    @staticmethod
+    def _draw_magnetization_forc(fig: 'Figure', h_grid: np.ndarray, hr_grid: np.ndarray, m: np.ndarray) -> None:
+        from mpl_toolkits.mplot3d import Axes3D  # registers the 3d projection
+        ax = fig.add_subplot(111, projection='3d')
+        ax.plot_surface(h_grid, hr_grid, m)
+
+    @staticmethod
+    def _draw_forc_diagram_hc_hu(fig: 'Figure', hc: np.ndarray, hu: np.ndarray, p: np.ndarray, limits: tuple) -> None:
+        n_contour = 9
+        min_hc, max_hc, min_hu, max_hu = limits
+        max_z = np.nanmax(p)
+
+        if max_hc > 1e6:
+            scale, unit = 1e6, 'MA/m'
+        elif max_hc > 1e3:
+            scale, unit = 1e3, 'kA/m'
+        else:
+            scale, unit = 1.0, 'A/m'
+
+        ax = fig.add_subplot(111)
+        ax.grid(which='both')
+        contours = ax.contourf(hc / scale, hu / scale, p / scale, n_contour, cmap='seismic',
+                               vmin=-max_z, vmax=max_z)
+        ax.set_xlabel('$H_c$, (' + unit + ')')
+        ax.set_ylabel('$H_u$, (' + unit + ')')
+        ax.set_xlim([min_hc / scale, max_hc / scale])
+        ax.set_ylim([min_hu / scale, max_hu / scale])
+        ax.set_title('FORC diagram', fontsize=14)
+        fig.colorbar(contours, ax=ax)
+        ax.set_aspect(aspect='equal')
@@ -0,0 +1,112 @@
+import json
+import os
+import zlib
+import numpy as np
+
+
+class ForcResultsFile:
+    """A file of FORC results: named arrays compressed in chunks of rows, and a JSON index with the metadata
+
+    The file starts with the magic bytes, followed by the compressed chunks of all arrays and the index, and ends
+    with the offset of the index. Every chunk is a block of consecutive rows (along the first axis) whose bytes
+    are shuffled, so that the bytes of the same significance of neighbouring values end up next to each other,
+    and deflated with zlib. Opening a file reads the index only; an array or a range of its rows is read and
+    inflated on request, chunk by chunk.
+    """
+
+    magic = b'PYFORC\x00\x01'
+    chunk_bytes = 2 ** 18  # the uncompressed size of a chunk the rows of an array are grouped to
+    level = 6
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(self.magic)) != self.magic:
+                raise Exception('The file ' + path + ' is not a FORC results file')
+            f.seek(-8, os.SEEK_END)
+            end = f.tell()
+            offset = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+            f.seek(offset)
+            index = json.loads(f.read(end - offset).decode())
+
+        self.metadata = index['metadata']
+        self.arrays = index['arrays']
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.read(name)
+
+    def names(self) -> list:
+        return list(self.arrays)
+
+    def shape(self, name: str) -> tuple:
+        return tuple(self.arrays[name]['shape'])
+
+    def dtype(self, name: str) -> np.dtype:
+        return np.dtype(self.arrays[name]['dtype'])
+
+    def read(self, name: str, first_row: int = 0, last_row: int = None) -> np.ndarray:
+        """Rows first_row..last_row-1 of the array, inflating only the chunks they lie in"""
+        entry = self.arrays[name]
+        shape = tuple(entry['shape'])
+        dtype = np.dtype(entry['dtype'])
+        last_row = shape[0] if last_row is None else min(last_row, shape[0])
+        first_row = min(max(first_row, 0), last_row)
+        result = np.empty((last_row - first_row,) + shape[1:], dtype=dtype)
+        row_size = int(np.prod(shape[1:], dtype=np.int64))
+        chunk_rows = entry['chunk_rows']
+        with open(self.path, 'rb') as f:
+            for k in range(first_row // chunk_rows, -(-last_row // chunk_rows)):
+                chunk_first = k * chunk_rows
+                chunk_last = min(chunk_first + chunk_rows, shape[0])
+                f.seek(entry['chunks'][k][0])
+                values = self._inflate(f.read(entry['chunks'][k][1]), dtype, (chunk_last - chunk_first) * row_size,
+                                       entry['shuffle']).reshape((chunk_last - chunk_first,) + shape[1:])
+                start = max(first_row, chunk_first)
+                stop = min(last_row, chunk_last)
+                result[start - first_row:stop - first_row] = values[start - chunk_first:stop - chunk_first]
+        return result
+
+    @staticmethod
+    def _inflate(data: bytes, dtype: np.dtype, count: int, shuffle: bool) -> np.ndarray:
+        raw = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+        if shuffle:
+            raw = raw.reshape((dtype.itemsize, count)).T.reshape(-1)
+        return raw.view(dtype)
+
+    @classmethod
+    def write(cls, path: str, arrays: dict, metadata: dict = None) -> str:
+        """Writes the arrays (anything with shape and dtype that can be sliced along the first axis, e.g. an
+        np.ndarray, np.memmap or PackedForcGrid) and JSON-serializable metadata to a new file at the path"""
+        # written under a temporary name first, so that a reader never sees a partial file
+        temporary_path = path + '.' + str(os.getpid()) + '.tmp'
+        located = {}
+        with open(temporary_path, 'wb') as f:
+            f.write(cls.magic)
+            for name, array in arrays.items():
+                shape = tuple(int(n) for n in array.shape)
+                if len(shape) == 0:
+                    raise Exception('The array ' + name + ' has no rows, scalars belong to the metadata')
+                dtype = np.dtype(array.dtype)
+                shuffle = dtype.itemsize > 1
+                row_bytes = int(np.prod(shape[1:], dtype=np.int64)) * dtype.itemsize
+                chunk_rows = max(1, cls.chunk_bytes // max(row_bytes, 1))
+                chunks = []
+                for first_row in range(0, shape[0], chunk_rows):
+                    raw = np.ascontiguousarray(array[first_row:first_row + chunk_rows], dtype=dtype).reshape(-1)
+                    raw = raw.view(np.uint8)
+                    if shuffle:
+                        raw = raw.reshape((-1, dtype.itemsize)).T
+                    data = zlib.compress(np.ascontiguousarray(raw).tobytes(), cls.level)
+                    chunks.append([f.tell(), len(data)])
+                    f.write(data)
+                located[name] = {'shape': list(shape), 'dtype': dtype.str, 'shuffle': shuffle,
+                                 'chunk_rows': chunk_rows, 'chunks': chunks}
+
+            offset = f.tell()
+            f.write(json.dumps({'metadata': metadata if metadata is not None else {}, 'arrays': located}).encode())
+            f.write(np.array([offset], dtype='<u8').tobytes())
+        os.replace(temporary_path, path)
+        return path
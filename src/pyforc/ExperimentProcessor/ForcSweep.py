@@ -0,0 +1,185 @@
+import argparse
+import concurrent.futures
+import copy
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+import numpy as np
+
+from pyforc.Particle.Hysteron import Hysteron
+from pyforc.Particle.SwParticle import SwParticle
+from pyforc.Particle.SwResponseTable import SwResponseTable
+from pyforc.Matter.SingleParticleMatter import SingleParticleMatter
+from pyforc.Matter.HysteronEnsembleMatter import HysteronEnsembleMatter
+from pyforc.Matter.SwEnsembleMatter import SwEnsembleMatter
+from pyforc.ExperimentProcessor.PikeFORC import PikeFORC
+from pyforc.ExperimentProcessor.ForcRenderer import ForcRenderer
+from pyforc.ExperimentProcessor.ForcSweepStore import ForcSweepStore
+
+
+def build_matter(description: dict):
+    """The matter of a job from its declarative description, e.g.
+
+    {'type': 'HysteronEnsembleMatter', 'n': 10000, 'seed': 1, 'coercivity': 0.3, 'coercivity_std': 0.05,
+     'bias': 0.0, 'bias_std': 0.05} - hysterons with alpha = bias + |coercivity|, beta = bias - |coercivity|
+    {'type': 'HysteronEnsembleMatter', 'alpha': [...], 'beta': [...]}
+    {'type': 'SwEnsembleMatter', 'n': 1000, 'seed': 1} or {'type': 'SwEnsembleMatter', 'psi': [...]}, optionally
+     with 'solver': 'table' and 'table': <path of the SwResponseTable file>
+    Both ensembles take an optional mean-field 'interaction' k.
+    {'type': 'Hysteron', 'alpha': 0.5, 'beta': -0.3} or {'type': 'SwParticle', 'psi': 0.7} - a single particle
+    """
+    kind = description.get('type')
+    interaction = description.get('interaction', 0.0)
+    if kind == 'HysteronEnsembleMatter':
+        if 'alpha' in description:
+            return HysteronEnsembleMatter(description['alpha'], description['beta'], interaction)
+        random = np.random.RandomState(description.get('seed'))
+        n = description['n']
+        coercivity = np.abs(random.normal(description['coercivity'], description.get('coercivity_std', 0.0), n))
+        bias = random.normal(description.get('bias', 0.0), description.get('bias_std', 0.0), n)
+        return HysteronEnsembleMatter(bias + coercivity, bias - coercivity, interaction)
+
+    if kind == 'SwEnsembleMatter':
+        solver = description.get('solver', 'newton')
+        table = SwResponseTable.load_or_build(description.get('table')) if solver == 'table' else None
+        if 'psi' in description:
+            return SwEnsembleMatter(description['psi'], solver, table, interaction)
+        psi = np.random.RandomState(description.get('seed')).uniform(0, np.pi, description['n'])
+        return SwEnsembleMatter(psi, solver, table, interaction)
+
+    if kind == 'Hysteron':
+        return SingleParticleMatter(Hysteron(description['alpha'], description['beta']))
+
+    if kind == 'SwParticle':
+        return SingleParticleMatter(SwParticle(description['psi']))
+
+    raise Exception('Unknown matter type: ' + str(kind))
+
+
+def run_sweep_job(config: dict, directory: str) -> (dict, dict):
+    """Simulates the FORCs and the FORC distribution of a job and returns its arrays and summary"""
+    start = time.perf_counter()
+    grid = config['grid']
+    renderer = ForcRenderer(headless=True) if config.get('plots', False) else None
+    forc = PikeFORC(grid['maxHc'], grid['minHu'], grid['maxHu'], build_matter(config['matter']), directory,
+                    N=grid.get('N'), SF=grid.get('SF'), renderer=renderer)
+    forc.magnetization_forc()
+    simulated = time.perf_counter()
+    forc.calculate_forc_distribution()
+    if renderer is not None:
+        forc.draw_forcs()
+        forc.draw_forc_diagram_hc_hu()
+
+    m = np.array(forc.Mgrid, dtype=float)
+    p = forc.PgridHcHu
+    summary = {'N': forc.N, 'SF': forc.SF, 'magnetization_seconds': simulated - start,
+               'total_seconds': time.perf_counter() - start}
+    if np.any(~np.isnan(p)):
+        peak = np.unravel_index(np.nanargmax(p), p.shape)
+        summary.update({'max_P': float(p[peak]), 'Hc_at_max_P': float(forc.Hcgrid[peak]),
+                        'Hu_at_max_P': float(forc.Hugrid[peak])})
+    return {'Hr': forc.Hr, 'H': forc.H, 'Mgrid': m, 'PgridHHr': np.array(forc.PgridHHr, dtype=float)}, summary
+
+
+class ForcSweep:
+    """Runs the FORC simulations of a list of declarative job configurations on a local process pool
+
+    A job is a dict with the matter description (see build_matter), the grid {'maxHc', 'minHu', 'maxHu' and
+    optionally 'N', 'SF'}, optionally a 'name' and 'plots': True to save the diagrams headless. At most
+    `workers` jobs run at a time. The results go to a ForcSweepStore in the sweep folder, under a hash of the
+    configuration; jobs already in the store are skipped, so an interrupted sweep continues where it stopped.
+    """
+
+    def __init__(self, directory: str, workers: int = 1):
+        self.directory = directory
+        self.workers = workers
+        self.store = ForcSweepStore(os.path.join(directory, 'store'))
+
+    @staticmethod
+    def key(config: dict) -> str:
+        return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def expand(template: dict, axes: dict) -> list:
+        """Configurations of every combination of the axes values, the axes named by dotted paths in the template
+
+        expand({'matter': {...}, 'grid': {...}}, {'matter.coercivity': [0.2, 0.3], 'grid.SF': [2, 4]})
+        """
+        configs = []
+        for values in itertools.product(*axes.values()):
+            config = copy.deepcopy(template)
+            for path, value in zip(axes, values):
+                *parents, name = path.split('.')
+                target = config
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                target[name] = value
+            configs.append(config)
+        return configs
+
+    def pending(self, configs: list) -> list:
+        keys = set()
+        pending = []
+        for config in configs:
+            key = self.key(config)
+            if key not in self.store and key not in keys:
+                keys.add(key)
+                pending.append(config)
+        return pending
+
+    def run(self, configs: list, log=None) -> list:
+        """Runs the jobs not yet in the store and returns the keys of all the configurations"""
+        pending = self.pending(configs)
+        if log is not None:
+            log(str(len(configs) - len(pending)) + ' jobs done before, ' + str(len(pending)) + ' to run')
+
+        if self.workers <= 1:
+            for config in pending:
+                self._store_result(config, run_sweep_job(config, self._job_directory(config)), log)
+            return [self.key(config) for config in configs]
+
+        # no more than two jobs per worker are submitted ahead, so the results waiting to be stored stay bounded
+        jobs = iter(pending)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+            running = {}
+            while True:
+                for config in itertools.islice(jobs, 2 * self.workers - len(running)):
+                    running[executor.submit(run_sweep_job, config, self._job_directory(config))] = config
+                if len(running) == 0:
+                    break
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    self._store_result(running.pop(future), future.result(), log)
+        return [self.key(config) for config in configs]
+
+    def _job_directory(self, config: dict) -> str:
+        return os.path.join(self.directory, 'jobs', self.key(config)[:16])
+
+    def _store_result(self, config: dict, result: tuple, log) -> None:
+        arrays, summary = result
+        self.store.put(self.key(config), config, arrays, summary)
+        if log is not None:
+            log('{:<40} {:8.2f} s'.format(config.get('name', self.key(config)[:16]), summary['total_seconds']))
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description='Runs a sweep of FORC simulations')
+    parser.add_argument('jobs', help='JSON file with a list of job configurations, or with a "template" and "axes"')
+    parser.add_argument('directory', help='folder of the sweep store and the job folders')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    arguments = parser.parse_args(arguments)
+
+    with open(arguments.jobs) as f:
+        jobs = json.load(f)
+    if isinstance(jobs, dict):
+        jobs = ForcSweep.expand(jobs['template'], jobs['axes'])
+
+    ForcSweep(arguments.directory, arguments.workers).run(jobs, print)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
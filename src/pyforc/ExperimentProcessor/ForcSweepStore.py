@@ -0,0 +1,98 @@
+import json
+import os
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, where a store has a single writer
+    fcntl = None
+
+
+class ForcSweepStore:
+    """The results of a sweep in one folder: the arrays of all jobs appended to sweep_data.bin, and
+    sweep_index.json with the configuration, the summary and the location of every array of a job
+
+    The index is rewritten (atomically) only after the arrays of a job are on disk, so a job is either fully in
+    the store or not at all. Summaries are read from the index alone; arrays are memory-mapped on request.
+    Bytes past the indexed arrays are ignored by readers. A writer holds a lock on sweep_data.bin while it
+    appends, so several processes can add jobs to the same store; under that lock it rereads the index and drops
+    what a crashed writer left after the indexed arrays.
+    """
+
+    index_name = 'sweep_index.json'
+    data_name = 'sweep_data.bin'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, self.index_name)
+        self.data_path = os.path.join(directory, self.data_name)
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        self.entries = self._read_index()
+
+    def _read_index(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)['entries']
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def keys(self) -> list:
+        return list(self.entries)
+
+    def put(self, key: str, config: dict, arrays: dict, summary: dict) -> None:
+        with open(self.data_path, 'ab') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                # other writers may have added jobs meanwhile; data that did not make it into the index is dropped
+                self.entries = self._read_index()
+                end = max([a['offset'] + a['bytes'] for e in self.entries.values() for a in e['arrays'].values()],
+                          default=0)
+                f.seek(0, os.SEEK_END)
+                if f.tell() > end:
+                    f.truncate(end)
+                f.seek(end)
+
+                located = {}
+                for name, array in arrays.items():
+                    array = np.ascontiguousarray(array)
+                    located[name] = {'offset': f.tell(), 'bytes': array.nbytes, 'shape': list(array.shape),
+                                     'dtype': array.dtype.str}
+                    f.write(array.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+                self.entries[key] = {'config': config, 'summary': summary, 'arrays': located}
+                temporary_path = self.index_path + '.' + str(os.getpid()) + '.tmp'
+                with open(temporary_path, 'w') as index:
+                    json.dump({'entries': self.entries}, index)
+                os.replace(temporary_path, self.index_path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def get(self, key: str, name: str) -> np.ndarray:
+        """A read-only memory map of the array of a job, e.g. 'Mgrid', 'PgridHHr', 'Hr' or 'H'"""
+        location = self.entries[key]['arrays'][name]
+        if location['bytes'] == 0:
+            return np.zeros(location['shape'], dtype=location['dtype'])
+        return np.memmap(self.data_path, dtype=location['dtype'], mode='r', offset=location['offset'],
+                         shape=tuple(location['shape']))
+
+    def config(self, key: str) -> dict:
+        return self.entries[key]['config']
+
+    def summary(self, key: str) -> dict:
+        return self.entries[key]['summary']
+
+    def summaries(self) -> list:
+        """(key, config, summary) of every job in the store"""
+        return [(key, entry['config'], entry['summary']) for key, entry in self.entries.items()]
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class PackedForcGrid:
+    """Values of a FORC grid at the measured points H >= Hr only, stored row after row in one flat array
+
+    Row i holds the columns first[i]..len(H)-1 at values[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, Hr: np.ndarray, H: np.ndarray, dtype=np.float64, path: str = None):
+        self.shape = (len(Hr), len(H))
+        self.first = np.searchsorted(H, Hr, side='left')
+        self.offsets = np.concatenate(([0], np.cumsum(len(H) - self.first)))
+        if path is None:
+            self.values = np.empty(self.offsets[-1], dtype=dtype)
+        else:
+            self.values = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(self.offsets[-1],))
+        self.values.fill(np.nan)
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.first.nbytes + self.offsets.nbytes
+
+    def flush(self) -> None:
+        if isinstance(self.values, np.memmap):
+            self.values.flush()
+
+    def row(self, i: int) -> np.ndarray:
+        """A view of the measured part of row i, i.e. of the columns first[i] and above"""
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def get_rows(self, first_row: int, last_row: int) -> np.ndarray:
+        """Rows first_row..last_row-1 as a dense float64 block with NaN at the points H < Hr"""
+        last_row = min(last_row, self.shape[0])
+        block = np.empty((max(last_row - first_row, 0), self.shape[1]))
+        block.fill(np.nan)
+        for k in range(len(block)):
+            block[k, self.first[first_row + k]:] = self.row(first_row + k)
+        return block
+
+    def set_rows(self, rows, block: np.ndarray) -> None:
+        """Stores the measured part of every row of a dense block, the rest of the block is ignored"""
+        for k in range(len(rows)):
+            self.row(rows[k])[:] = block[k, self.first[rows[k]]:]
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            i, j = index
+            if j < self.first[i]:
+                return np.nan
+            return self.values[self.offsets[i] + j - self.first[i]]
+        if isinstance(index, slice):
+            first_row, last_row, step = index.indices(self.shape[0])
+            if step != 1:
+                raise Exception('Only contiguous blocks of rows can be read from a packed grid')
+            return self.get_rows(first_row, last_row)
+        if index < 0:
+            index += self.shape[0]
+        return self.get_rows(index, index + 1)[0]
+
+    def __array__(self, dtype=None, copy=None):
+        if copy is False:
+            raise ValueError('A packed grid cannot be viewed as a dense array without a copy')
+        block = self.get_rows(0, self.shape[0])
+        return block if dtype is None else block.astype(dtype)
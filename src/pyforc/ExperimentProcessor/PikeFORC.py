@@ -0,0 +1,550 @@
+import concurrent.futures
+import contextlib
+import datetime
+import json
+import os
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pyforc.Matter.MagneticMatter import MagneticMatter
+from pyforc.ExperimentProcessor.PackedForcGrid import PackedForcGrid
+from pyforc.ExperimentProcessor.ForcCache import ForcCache
+from pyforc.ExperimentProcessor.ForcInstrumentation import ForcInstrumentation
+from pyforc.ExperimentProcessor.ForcRenderer import ForcRenderer
+from pyforc.ExperimentProcessor.ForcResultsFile import ForcResultsFile
+
+
+def simulate_forc_rows(matter: MagneticMatter, Hr: np.ndarray, H: np.ndarray, rows, replay_first: bool = False):
+    """Magnetization along the reversal curves of the given rows (in descending order), NaN where H < Hr
+
+    Every curve starts from positive saturation. Before a curve whose predecessor in the serial order (the row
+    above it) was not just simulated, that predecessor is replayed, so particles that keep state between curves
+    reach the same state as in an uninterrupted serial run. For the first curve this is up to the caller.
+    """
+    m = np.empty((len(rows), len(H)))
+    m.fill(np.nan)
+    for k in range(len(rows)):
+        i = rows[k]
+        if i + 1 < len(Hr) and ((k == 0 and replay_first) or (k > 0 and rows[k - 1] != i + 1)):
+            _simulate_forc_curve(matter, Hr[i + 1], H)
+
+        m[k] = _simulate_forc_curve(matter, Hr[i], H)
+    return m
+
+
+def simulate_forc_rows_timed(matter: MagneticMatter, Hr: np.ndarray, H: np.ndarray, rows, replay_first: bool = False):
+    """simulate_forc_rows with the wall time of every row and the calls counted on the matter meanwhile"""
+    counts = matter.call_counts
+    counts_before = dict(counts)
+    m = np.empty((len(rows), len(H)))
+    seconds = np.empty(len(rows))
+    for k in range(len(rows)):
+        replay = (k == 0 and replay_first) or (k > 0 and rows[k - 1] != rows[k] + 1)
+        start = time.perf_counter()
+        m[k] = simulate_forc_rows(matter, Hr, H, rows[k:k + 1], replay)[0]
+        seconds[k] = time.perf_counter() - start
+    return m, seconds, {name: n - counts_before.get(name, 0) for name, n in counts.items()}
+
+
+def _simulate_forc_curve(matter: MagneticMatter, hr: float, H: np.ndarray) -> np.ndarray:
+    m = np.empty(len(H))
+    m.fill(np.nan)
+    matter.saturate_to_positive()
+    matter.magnetize(hr)
+
+    measured = H >= hr
+    m[measured] = matter.magnetize_sweep(H[measured])
+    return m
+
+
+class PikeFORC:
+    N = 101
+    SF = 4
+    block_elements = 2 ** 22  # the size of the temporary arrays a block of rows is processed with
+    checkpoint_rows = 10  # reversal curves simulated between two checkpoint writes
+
+    def __init__(self, maxHc: float, minHu: float, maxHu: float, matter: MagneticMatter, directory: str,
+                 packed: bool = False, dtype=np.float64, N: int = None, SF: int = None, memmap: bool = False,
+                 cache: ForcCache = None, instrument: bool = False, renderer: ForcRenderer = None):
+        if N is not None:
+            self.N = N
+        if SF is not None:
+            self.SF = SF
+
+        minHc = 0
+        self.maxHr = maxHu - minHc
+        self.minHr = minHu - maxHc
+        self.maxH = maxHu + maxHc
+        self.minH = self.minHr
+        self.Hr = np.round(np.linspace(self.minHr, self.maxHr, self.N, dtype=float), decimals=4)
+        self.Hstep = np.mean(np.diff(self.Hr))
+        self.minHc = minHc
+        self.maxHc = maxHc
+        self.minHu = minHu
+        self.maxHu = maxHu
+
+        if self.maxH < self.maxHr:
+            self.maxH = self.maxHr
+
+        self.H = np.concatenate((self.Hr, np.arange((self.Hr[self.N - 1] + self.Hstep), self.maxH, self.Hstep)))
+
+        self.matter = matter
+        self.cache = cache
+        self.FolderForResults_common = os.path.join(directory, 'Common')
+        self.FolderForResults_with_time = os.path.join(directory, 'By time',
+                                                       datetime.datetime.now().strftime("%H_%M_%S"))
+
+        if not os.path.exists(self.FolderForResults_common):
+            os.makedirs(self.FolderForResults_common)
+
+        if not os.path.exists(self.FolderForResults_with_time):
+            os.makedirs(self.FolderForResults_with_time)
+
+        # Only Mgrid and PgridHHr are stored, either as full len(Hr) x len(H) arrays or packed to the measured
+        # points H >= Hr, optionally in memory-mapped .npy files of the results folder. The field grids and
+        # PgridHcHu are computed on demand.
+        self.Mgrid = self._create_grid('Mgrid', packed, dtype, memmap)
+        self.PgridHHr = self._create_grid('PgridHHr', packed, dtype, memmap)
+
+        self.renderer = renderer if renderer is not None else ForcRenderer()
+        self.instrumentation = None
+        if instrument:
+            self.instrumentation = ForcInstrumentation(os.path.join(self.FolderForResults_with_time,
+                                                                    'run_report.json'))
+
+    def _phase(self, name: str):
+        if self.instrumentation is None:
+            return contextlib.nullcontext()
+        return self.instrumentation.phase(name)
+
+    def _create_grid(self, name: str, packed: bool, dtype, memmap: bool):
+        path = None
+        if memmap:
+            # runs started within the same second share the results folder
+            path = os.path.join(self.FolderForResults_with_time, name + '.npy')
+            copy_number = 1
+            while os.path.exists(path):
+                path = os.path.join(self.FolderForResults_with_time, name + '_' + str(copy_number) + '.npy')
+                copy_number += 1
+        if packed:
+            return PackedForcGrid(self.Hr, self.H, dtype, path)
+
+        grid_size = (len(self.Hr), len(self.H))
+        if memmap:
+            grid = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=grid_size)
+        else:
+            grid = np.empty(grid_size, dtype=dtype)
+        grid.fill(np.nan)
+        return grid
+
+    def _rows_per_block(self, elements_per_row: int) -> int:
+        return max(1, self.block_elements // elements_per_row)
+
+    def flush(self) -> None:
+        for grid in (self.Mgrid, self.PgridHHr):
+            if isinstance(grid, (np.memmap, PackedForcGrid)):
+                grid.flush()
+
+    @property
+    def Hgrid(self) -> np.ndarray:
+        return np.meshgrid(self.H, self.Hr)[0]
+
+    @property
+    def Hrgrid(self) -> np.ndarray:
+        return np.meshgrid(self.H, self.Hr)[1]
+
+    @property
+    def Hugrid(self) -> np.ndarray:
+        with self._phase('coordinate_transforms'):
+            return np.round((self.H[None, :] + self.Hr[:, None]) / 2.0, 4)
+
+    @property
+    def Hcgrid(self) -> np.ndarray:
+        with self._phase('coordinate_transforms'):
+            return np.round((self.H[None, :] - self.Hr[:, None]) / 2.0, 4)
+
+    @property
+    def PgridHcHu(self) -> np.ndarray:
+        with self._phase('coordinate_transforms'):
+            p = np.array(self.PgridHHr, dtype=float)
+            hu = self.Hugrid
+            hc = self.Hcgrid
+            p[(hu > self.maxHu) | (hu < self.minHu)] = np.nan
+            p[(hc > self.maxHc) | (hc < self.minHc)] = np.nan
+            return p
+
+    @staticmethod
+    def _read_rows(grid, first_row: int, last_row: int) -> np.ndarray:
+        if isinstance(grid, PackedForcGrid):
+            return grid.get_rows(first_row, last_row)
+        return grid[first_row:last_row]
+
+    @staticmethod
+    def _write_rows(grid, rows, values: np.ndarray) -> None:
+        if isinstance(grid, PackedForcGrid):
+            grid.set_rows(rows, values)
+        else:
+            grid[rows] = values
+
+    def get_magnetization_rows(self, first_row: int = 0, last_row: int = None) -> np.ndarray:
+        """Rows first_row..last_row-1 of Mgrid as a dense array with NaN at the points H < Hr"""
+        return self._read_rows(self.Mgrid, first_row, len(self.Hr) if last_row is None else last_row)
+
+    def write_magnetization_rows(self, rows, values: np.ndarray) -> None:
+        """Stores rows of Mgrid obtained elsewhere, e.g. regridded measurements"""
+        self._write_rows(self.Mgrid, rows, values)
+
+    def write_distribution_rows(self, rows, values: np.ndarray) -> None:
+        """Stores rows of PgridHHr obtained elsewhere, e.g. by an adaptive refinement"""
+        self._write_rows(self.PgridHHr, rows, values)
+
+    def grid_key(self) -> str:
+        """A stable hash of the matter configuration, the field grid and the dtype of the grids"""
+        return ForcCache.key(self.matter, self.Hr, self.H, self.Mgrid.dtype)
+
+    def magnetization_forc(self, workers: int = 1, checkpoint: bool = False):
+        with self._phase('magnetization_forc'):
+            if self._load_from_cache(self.Mgrid):
+                return
+
+            thresholds = self.matter.preisach_thresholds()
+            if thresholds is not None:
+                self._preisach_magnetization_forc(*thresholds)
+            else:
+                if checkpoint:
+                    self._start_checkpoint()
+                self._simulate_rows(np.arange(len(self.Hr) - 1, 0, -1), workers, checkpoint, False)
+                if checkpoint:
+                    self._remove_checkpoint()
+            self._store_in_cache(self.Mgrid)
+
+    def resume(self, workers: int = 1):
+        """Continues magnetization_forc(checkpoint=True) of the same matter and grid, skipping the saved rows"""
+        with self._phase('magnetization_forc'):
+            if self._load_from_cache(self.Mgrid):
+                self._remove_checkpoint()
+                return
+            if self.matter.preisach_thresholds() is not None:
+                self.magnetization_forc(workers)
+                self._remove_checkpoint()
+                return
+
+            done = self._load_checkpoint()
+            rows = np.array([i for i in range(len(self.Hr) - 1, 0, -1) if i not in done], dtype=int)
+            self._simulate_rows(rows, workers, True, True)
+            self._remove_checkpoint()
+            self._store_in_cache(self.Mgrid)
+
+    def _load_from_cache(self, grid, SF: int = None) -> bool:
+        if self.cache is None:
+            return False
+
+        cached = self.cache.get(self.grid_key(), SF)
+        if cached is None or cached.shape != (len(self.Hr), len(self.H)):
+            return False
+
+        self._write_rows(grid, np.arange(len(self.Hr)), cached)
+        self.flush()
+        return True
+
+    def _store_in_cache(self, grid, SF: int = None) -> None:
+        if self.cache is not None:
+            self.cache.put(self.grid_key(), grid, SF)
+
+    def _simulate_rows(self, rows: np.ndarray, workers: int, checkpoint: bool, replay_first: bool):
+        if self.instrumentation is None:
+            self._simulate_row_blocks(rows, workers, checkpoint, replay_first)
+            return
+
+        ForcInstrumentation.install_counters(self.matter)
+        try:
+            self._simulate_row_blocks(rows, workers, checkpoint, replay_first)
+        finally:
+            ForcInstrumentation.remove_counters(self.matter)
+
+    def _simulate_forc_rows(self, rows: np.ndarray, replay_first: bool) -> np.ndarray:
+        if self.instrumentation is None:
+            return simulate_forc_rows(self.matter, self.Hr, self.H, rows, replay_first)
+        return self._record_timed_rows(rows, simulate_forc_rows_timed(self.matter, self.Hr, self.H, rows,
+                                                                      replay_first))
+
+    def _record_timed_rows(self, rows: np.ndarray, result: tuple) -> np.ndarray:
+        m, seconds, counts = result
+        self.instrumentation.add_row_times(rows, seconds)
+        self.instrumentation.add_counts(counts)
+        return m
+
+    def _simulate_row_blocks(self, rows: np.ndarray, workers: int, checkpoint: bool, replay_first: bool):
+        rows_per_block = self._rows_per_block(len(self.H))
+        if checkpoint:
+            rows_per_block = min(rows_per_block, self.checkpoint_rows)
+
+        if workers <= 1 or len(rows) == 0:
+            for first in range(0, len(rows), rows_per_block):
+                chunk = rows[first:first + rows_per_block]
+                m = self._simulate_forc_rows(chunk, replay_first)
+                self._write_rows(self.Mgrid, chunk, m)
+                if checkpoint:
+                    self._append_checkpoint(chunk, m)
+                replay_first = False
+            self.flush()
+            return
+
+        # contiguous chunks of reversal curves with about the same number of points each, at least one per worker
+        # and small enough to keep the results in flight bounded
+        n_chunks = max(workers, int(np.ceil(len(rows) / rows_per_block)))
+        points = np.cumsum([np.count_nonzero(self.H >= self.Hr[i]) for i in rows])
+        bounds = np.searchsorted(points, points[-1] * np.arange(1, n_chunks) / n_chunks, side='right')
+        chunks = [chunk for chunk in np.split(rows, bounds) if len(chunk) > 0]
+
+        simulate = simulate_forc_rows if self.instrumentation is None else simulate_forc_rows_timed
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            futures = {executor.submit(simulate, self.matter, self.Hr, self.H, chunk, True): chunk
+                       for chunk in chunks}
+            for future in concurrent.futures.as_completed(futures):
+                m = future.result()
+                if self.instrumentation is not None:
+                    m = self._record_timed_rows(futures[future], m)
+                self._write_rows(self.Mgrid, futures[future], m)
+                if checkpoint:
+                    self._append_checkpoint(futures[future], m)
+        self.flush()
+
+    def _checkpoint_path(self) -> str:
+        return os.path.join(self.FolderForResults_common, 'checkpoint_' + self.grid_key()[:16])
+
+    def _start_checkpoint(self):
+        path = self._checkpoint_path()
+        with open(path + '.json', 'w') as f:
+            json.dump({'matter': self.matter.__class__.__name__, 'fingerprint': self.matter.fingerprint(),
+                       'Hr': self.Hr.tolist(), 'H': self.H.tolist()}, f)
+        open(path + '.rows', 'wb').close()
+
+    def _append_checkpoint(self, rows, m: np.ndarray):
+        # a record is the row index followed by the whole row of Mgrid
+        records = np.empty((len(rows), len(self.H) + 1))
+        records[:, 0] = rows
+        records[:, 1:] = m
+        with open(self._checkpoint_path() + '.rows', 'ab') as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _remove_checkpoint(self):
+        # only called once all rows are written and flushed to Mgrid
+        for extension in ('.json', '.rows'):
+            try:
+                os.remove(self._checkpoint_path() + extension)
+            except FileNotFoundError:
+                pass
+
+    def _load_checkpoint(self) -> set:
+        path = self._checkpoint_path()
+        if not os.path.exists(path + '.json') or not os.path.exists(path + '.rows'):
+            self._start_checkpoint()
+            return set()
+
+        with open(path + '.json') as f:
+            description = json.load(f)
+        if description['fingerprint'] != self.matter.fingerprint() or not (
+                np.array_equal(description['Hr'], self.Hr) and np.array_equal(description['H'], self.H)):
+            raise Exception('The checkpoint ' + path + ' belongs to another matter or grid')
+
+        record_size = (len(self.H) + 1) * 8
+        with open(path + '.rows', 'r+b') as f:
+            data = f.read()
+            # a record cut off when the run was killed is dropped, so that appended records stay aligned
+            f.truncate(len(data) // record_size * record_size)
+
+        records = np.frombuffer(data, count=len(data) // record_size * (len(self.H) + 1)).reshape(
+            (-1, len(self.H) + 1))
+        rows = records[:, 0].astype(int)
+        if len(rows) > 0:
+            self._write_rows(self.Mgrid, rows, records[:, 1:])
+        return set(rows.tolist())
+
+    def _preisach_magnetization_forc(self, alpha: np.ndarray, beta: np.ndarray):
+        # After positive saturation and the reversal field Hr a hysteron is down if beta > Hr and it stays down
+        # on the way up to H while alpha >= H. Counting these hysterons for every (Hr, H) pair is a 2D suffix sum
+        # over a histogram of the thresholds indexed by the grid positions at which they take effect. The rows
+        # are filled from the bottom in blocks, carrying the column histogram of the hysterons below the block.
+        n_hr = len(self.Hr)
+        n_h = len(self.H)
+        beta_index = np.searchsorted(self.Hr, beta, side='left')  # number of Hr values below beta
+        alpha_index = np.searchsorted(self.H, alpha, side='right')  # number of H values up to alpha
+        order = np.argsort(beta_index, kind='stable')
+        beta_index = beta_index[order]
+        alpha_index = alpha_index[order]
+
+        rows_per_block = self._rows_per_block(n_h + 1)
+        carry = np.zeros(n_h + 1, dtype=np.int64)
+        for last_row in range(n_hr, 0, -rows_per_block):
+            first_row = max(last_row - rows_per_block, 0)
+            block = slice(np.searchsorted(beta_index, first_row, side='right'),
+                          np.searchsorted(beta_index, last_row, side='right'))
+            counts = np.bincount((beta_index[block] - first_row - 1) * (n_h + 1) + alpha_index[block],
+                                 minlength=(last_row - first_row) * (n_h + 1)).reshape((last_row - first_row, n_h + 1))
+            columns = carry + counts[::-1].cumsum(axis=0)[::-1]
+            down = columns[:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:]
+            carry = columns[0]
+
+            magnetization = (len(alpha) - 2 * down) / len(alpha)
+            magnetization[self.H[None, :] < self.Hr[first_row:last_row, None]] = np.nan
+            rows = np.arange(max(first_row, 1), last_row)
+            self._write_rows(self.Mgrid, rows, magnetization[rows - first_row])
+        self.flush()
+
+    def calculate_forc_distribution(self):
+        with self._phase('calculate_forc_distribution'):
+            if self._load_from_cache(self.PgridHHr, self.SF):
+                return
+
+            rows_per_block = self._rows_per_block(len(self.H) * (2 * self.SF) ** 2)
+            for first_row in range(0, len(self.Hr), rows_per_block):
+                last_row = min(first_row + rows_per_block, len(self.Hr))
+                self._write_rows(self.PgridHHr, np.arange(first_row, last_row),
+                                 self._get_forc_distribution_rows(first_row, last_row))
+            self.flush()
+            self._store_in_cache(self.PgridHHr, self.SF)
+
+    def _get_forc_distribution_rows(self, first_row: int, last_row: int) -> np.ndarray:
+        # The same local fits as _get_local_forc_distribution, done for a block of rows at once: the normal
+        # equations of every window are built from window sums of the monomials of the offsets from the window
+        # origin (in units of Hstep, which keeps them well conditioned; the hr*h coefficient does not depend
+        # on the origin) and solved as a batch. Windows whose normal matrix is close to singular fall back
+        # to the least-squares fit of _get_local_forc_distribution.
+        window = 2 * self.SF
+        n_h = len(self.H)
+
+        m_padded = np.pad(self._read_rows(self.Mgrid, max(first_row - self.SF, 0), last_row + self.SF - 1),
+                          ((max(self.SF - first_row, 0), max(last_row + self.SF - 1 - len(self.Hr), 0)),
+                           (self.SF, self.SF)), mode='constant', constant_values=np.nan)
+        m_windows = sliding_window_view(m_padded, (window, window))[:, :n_h]
+        valid = ~np.isnan(m_windows)
+        weights = valid.astype(float)
+        m_values = np.where(valid, m_windows, 0.0)
+
+        hr_padded = np.pad(self.Hr, self.SF, mode='edge')
+        h_padded = np.pad(self.H, self.SF, mode='edge')
+        x = (sliding_window_view(hr_padded, window)[first_row:last_row] -
+             self.Hr[first_row:last_row, None]) / self.Hstep
+        y = (sliding_window_view(h_padded, window)[:n_h] - self.H[:, None]) / self.Hstep
+
+        # m = a0 + a1*hr + a2*h + a3*hr**2 + a4*h**2 + a5*hr*h
+        powers = ((0, 0), (1, 0), (0, 1), (2, 0), (0, 2), (1, 1))
+        moments = {}
+        for p in range(5):
+            for q in range(5 - p):
+                moments[p, q] = np.einsum('ijab,ia,jb->ij', weights, x ** p, y ** q, optimize=True)
+
+        normal_matrix = np.empty(weights.shape[:2] + (6, 6))
+        right_side = np.empty(weights.shape[:2] + (6,))
+        for k, (pk, qk) in enumerate(powers):
+            right_side[..., k] = np.einsum('ijab,ia,jb->ij', m_values, x ** pk, y ** qk, optimize=True)
+            for l, (pl, ql) in enumerate(powers):
+                normal_matrix[..., k, l] = moments[pk + pl, qk + ql]
+
+        result = np.empty(weights.shape[:2])
+        result.fill(np.nan)
+        to_fit = (self.H[None, :] >= self.Hr[first_row:last_row, None]) & (moments[0, 0] >= 6)
+        if not np.any(to_fit):
+            return result
+
+        singular_values = np.linalg.svd(normal_matrix[to_fit], compute_uv=False)
+        well_conditioned = singular_values[:, -1] > singular_values[:, 0] * 1e-12
+
+        rows, cols = np.nonzero(to_fit)
+        a = np.linalg.solve(normal_matrix[rows[well_conditioned], cols[well_conditioned]],
+                            right_side[rows[well_conditioned], cols[well_conditioned], :, None])
+        result[rows[well_conditioned], cols[well_conditioned]] = -a[:, 5, 0] / self.Hstep ** 2
+        if self.instrumentation is not None:
+            self.instrumentation.count('batched surface fits', len(a))
+
+        for i, j in zip(rows[~well_conditioned], cols[~well_conditioned]):
+            result[i, j] = self._get_local_forc_distribution(first_row + i, j)
+
+        return result
+
+    def _get_local_forc_distribution(self, i, j) -> float:
+        h = np.array([])
+        hr = np.array([])
+        m = np.array([])
+
+        for u in range(i - self.SF, i + self.SF, 1):
+            if u < 0 or u >= len(self.Hr):
+                continue
+            for v in range(j - self.SF, j + self.SF, 1):
+                if v < 0 or v >= len(self.H):
+                    continue
+
+                if np.isnan(self.Mgrid[u, v]):
+                    continue
+
+                hr = np.append(hr, self.Hr[u])
+                h = np.append(h, self.H[v])
+                m = np.append(m, self.Mgrid[u, v])
+
+        if len(m) < 6:
+            return np.nan
+
+        an = self._poly2_surface_fit(hr, h, m)
+
+        return -an[0][5]
+
+    def _poly2_surface_fit(self, hr: np.ndarray, h: np.ndarray, m: np.ndarray) -> tuple:
+        # Xa=m, where x - products of h and hr
+        # m = a0 + a1*hr + a2*h + a3*hr**2 + a4*h**2 + a5*hr*h
+        a_number = 6
+        X = np.zeros((len(m), a_number))
+
+        X[:, 0] = hr ** 0 * h ** 0
+        X[:, 1] = hr ** 1 * h ** 0
+        X[:, 2] = hr ** 0 * h ** 1
+        X[:, 3] = hr ** 2 * h ** 0
+        X[:, 4] = hr ** 0 * h ** 2
+        X[:, 5] = hr ** 1 * h ** 1
+
+        if self.instrumentation is not None:
+            self.instrumentation.count('lstsq surface fits')
+        a = np.linalg.lstsq(X, m, rcond=None)
+        return a
+
+    def _draw(self, draw):
+        with self._phase('plotting'):
+            result = draw(self)
+            if self.instrumentation is not None and hasattr(result, 'result'):
+                # an instrumented run waits for a background image, so that the phase times the drawing itself
+                result = result.result()
+            return result
+
+    def draw_magnetization_forc(self):
+        return self._draw(self.renderer.draw_magnetization_forc)
+
+    def draw_forc_diagram_hc_hu(self):
+        return self._draw(self.renderer.draw_forc_diagram_hc_hu)
+
+    def draw_forcs(self):
+        return self._draw(self.renderer.draw_forcs)
+
+    def save_data_to_file(self):
+        import scipy.io
+        with self._phase('saving'):
+            data_to_save = {}
+            data_to_save['P'] = self.PgridHcHu
+            scipy.io.savemat(os.path.join(self.FolderForResults_common, "forc_diagram_data.mat"), data_to_save)
+
+    def save_results(self, path: str = None, description: dict = None) -> str:
+        """Writes Mgrid, PgridHHr, the Hr and H axes, the smoothing factor and a description of the matter (e.g.
+        the configuration it was built from) to a ForcResultsFile, by default forc_results.pyforc in the results
+        folder of this run"""
+        if path is None:
+            path = os.path.join(self.FolderForResults_with_time, 'forc_results.pyforc')
+        matter = {'type': self.matter.__class__.__name__}
+        matter.update(description if description is not None else {})
+        matter['fingerprint'] = self.matter.fingerprint()
+        metadata = {'SF': int(self.SF), 'N': int(self.N), 'maxHc': float(self.maxHc), 'minHu': float(self.minHu),
+                    'maxHu': float(self.maxHu),
+                    'matter': matter, 'created': datetime.datetime.now().isoformat()}
+        with self._phase('saving'):
+            return ForcResultsFile.write(path, {'Mgrid': self.Mgrid, 'PgridHHr': self.PgridHHr, 'Hr': self.Hr,
+                                                'H': self.H}, metadata)
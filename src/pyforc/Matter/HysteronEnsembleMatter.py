@@ -0,0 +1,125 @@
+from pyforc.Matter.MagneticMatter import MagneticMatter
+import numpy as np
+
+
+class HysteronEnsembleMatter(MagneticMatter):
+    """An ensemble of hysterons stored as arrays of switching fields and int8 states, optionally in a mean field
+
+    After a field h every hysteron with alpha < h is up and every one with beta > h is down, so a change of the
+    field can only flip the hysterons with a threshold between the last field and the new one. These are found
+    by binary search in the sorted thresholds, a field step costs O(log n + crossed thresholds).
+    """
+
+    def __init__(self, alpha, beta, interaction: float = 0.0):
+        super().__init__()
+        self.interaction = interaction
+
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.beta = np.asarray(beta, dtype=float)
+
+        if self.alpha.shape != self.beta.shape or self.alpha.ndim != 1 or len(self.alpha) == 0:
+            raise Exception('Alpha and beta should be non-empty one-dimensional arrays of the same length')
+
+        if np.any(self.alpha < self.beta):
+            raise Exception('Alpha parameter should be greater or equal than beta')
+
+        self.alpha_order = np.argsort(self.alpha, kind='stable')
+        self.sorted_alpha = self.alpha[self.alpha_order]
+        self.beta_order = np.argsort(self.beta, kind='stable')
+        self.sorted_beta = self.beta[self.beta_order]
+
+        self.state = np.ones(len(self.alpha), dtype=np.int8)
+        self.state_sum = len(self.state)
+        self.last_field = np.inf  # None if the state does not follow from the last field
+        self.journal = None  # the hysterons flipped since save_state
+
+        width = (self.alpha - self.beta) / 2
+        self.positive_saturation_field = max(-1.0, np.max(self.alpha + width))
+        self.negative_saturation_field = min(1.0, np.min(self.beta - width))
+        self.magnetization = self.state_sum / len(self.state)
+
+    @classmethod
+    def from_hysterons(cls, hysterons):
+        matter = cls([h.alpha for h in hysterons], [h.beta for h in hysterons])
+        matter.state[:] = [h.magnetization for h in hysterons]
+        matter.state_sum = int(np.sum(matter.state, dtype=np.int64))
+        matter.last_field = None
+        matter.magnetization = matter.state_sum / len(matter.state)
+        return matter
+
+    def _magnetize_particles(self, field):
+        if self.last_field is None:
+            self._flip(np.nonzero((field > self.alpha) & (self.state < 0))[0], 1)
+            self._flip(np.nonzero((field < self.beta) & (self.state > 0))[0], -1)
+        elif field > self.last_field:
+            # up: last_field <= alpha < field
+            crossed = self.alpha_order[np.searchsorted(self.sorted_alpha, self.last_field, side='left'):
+                                       np.searchsorted(self.sorted_alpha, field, side='left')]
+            self._flip(crossed[self.state[crossed] < 0], 1)
+        elif field < self.last_field:
+            # down: field < beta <= last_field
+            crossed = self.beta_order[np.searchsorted(self.sorted_beta, field, side='right'):
+                                      np.searchsorted(self.sorted_beta, self.last_field, side='right')]
+            self._flip(crossed[self.state[crossed] > 0], -1)
+
+        self.last_field = field
+        self.magnetization = self.state_sum / len(self.state)
+
+    def _flip(self, indices: np.ndarray, new_state: int) -> None:
+        self.state[indices] = new_state
+        self.state_sum += 2 * new_state * len(indices)
+        if self.journal is not None:
+            self.journal.append(indices)
+
+    def save_state(self):
+        # the flips from here on are journaled, so that restore_state can undo them
+        self.journal = []
+        return self.last_field, self.state_sum
+
+    def restore_state(self, state):
+        for indices in reversed(self.journal):
+            self.state[indices] = -self.state[indices]
+        self.journal = []
+        self.last_field, self.state_sum = state
+
+    def saturate_to_positive(self):
+        self.state.fill(1)
+        self.state_sum = len(self.state)
+        self.last_field = np.inf
+        self.journal = None
+        self.magnetization = 1.0
+
+    def saturate_to_negative(self):
+        self.state.fill(-1)
+        self.state_sum = -len(self.state)
+        self.last_field = -np.inf
+        self.journal = None
+        self.magnetization = -1.0
+
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        digest.update(self.alpha.tobytes())
+        digest.update(self.beta.tobytes())
+
+    def preisach_thresholds(self):
+        if self.interaction != 0:
+            return None
+        return self.alpha, self.beta
+
+    def draw_matter_representation(self, directory):
+        import matplotlib.pyplot as plt
+        hmax = self.positive_saturation_field
+        hstep = 0.01
+        field = np.concatenate(
+            (np.arange(0.0, hmax, hstep), np.arange(hmax, -hmax, -hstep), np.arange(-hmax, hmax + hstep, hstep)))
+        magnetization = self.magnetize_sweep(field)
+
+        fig = plt.figure()
+        ax = fig.add_subplot(111)
+        ax.plot(field, magnetization)
+        ax.set_xlabel("h")
+        ax.set_ylabel("m")
+        ax.set_title("m(h) of hysteron ensemble (n=" + str(len(self.state)) + ")")
+        ax.grid(which='both')
+        ax.set_aspect('equal')
+        plt.show()
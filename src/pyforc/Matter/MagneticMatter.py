@@ -0,0 +1,109 @@
+import hashlib
+import numpy as np
+
+
+class MagneticMatter:
+    interaction_tolerance = 1e-9
+    interaction_max_iterations = 200
+    interaction_jump_width = 1e-6  # the bracket width at which a change of sign of g is taken for a jump
+
+    def __init__(self):
+        self.magnetization = 0.0
+        self.positive_saturation_field = 0.0
+        self.negative_saturation_field = 0.0
+        self.interaction = 0.0  # k of the mean field: every particle sees field + k * magnetization
+        self.interaction_slope = None  # dg/dm of the last self-consistent step
+
+    def magnetize(self, field) -> None:
+        if self.interaction == 0:
+            self._magnetize_particles(field)
+        else:
+            self._magnetize_self_consistently(field)
+
+    def _magnetize_particles(self, field) -> None:
+        """Applies the field to the particles, without the mean field"""
+        pass
+
+    def save_state(self):
+        """The magnetic state of the particles, to be put back by restore_state"""
+        return None
+
+    def restore_state(self, state) -> None:
+        pass
+
+    def _magnetize_self_consistently(self, field) -> None:
+        # Solves m = F(field + k * m) for the solution nearest to the last magnetization, where F is the response
+        # of the particles from their state before this step, so every trial field starts from that state.
+        # Plain fixed-point steps from the last magnetization never pass the nearest solution. Secant steps, the
+        # first one with the slope dg/dm of g = F - m left from the last field step, are taken where g has a
+        # single root (k < 0) or the iteration contracts at least twice per step (slope <= -0.5), so that they
+        # do not jump over the end of an avalanche (k > 0). Once g changes sign the steps stay inside the
+        # bracket. At a switching particle F jumps and g may change sign without a root; the bracket then
+        # shrinks to the jump and the particles are left in the state of its side nearer to the last m.
+        state = self.save_state()
+        m = self.magnetization
+        self._magnetize_particles(field + self.interaction * m)
+        g = self.magnetization - m
+        near_sign = np.sign(g)
+        slope = self.interaction_slope
+        bracket = {}  # the last m with g > 0 and with g < 0
+        for _ in range(self.interaction_max_iterations):
+            if abs(g) <= self.interaction_tolerance:
+                self.interaction_slope = slope
+                return
+            bracket[np.sign(g)] = m
+            if len(bracket) == 2 and abs(bracket[1] - bracket[-1]) <= self.interaction_jump_width:
+                break
+
+            step = g
+            if slope is not None and slope < 0 and (self.interaction < 0 or slope <= -0.5):
+                step = -g / slope
+            next_m = min(max(m + step, -1.0), 1.0)
+            if len(bracket) == 2 and not min(bracket.values()) < next_m < max(bracket.values()):
+                next_m = (bracket[1] + bracket[-1]) / 2
+
+            self.restore_state(state)
+            self._magnetize_particles(field + self.interaction * next_m)
+            next_g = self.magnetization - next_m
+            slope = (next_g - g) / (next_m - m) if next_m != m else None
+            m = next_m
+            g = next_g
+
+        if len(bracket) == 2 and np.sign(g) != near_sign:
+            self.restore_state(state)
+            self._magnetize_particles(field + self.interaction * bracket[near_sign])
+
+    def magnetize_sweep(self, fields: np.ndarray) -> np.ndarray:
+        """Applies the fields one after another and returns the magnetization after each of them"""
+        magnetization = np.zeros(len(fields))
+        for i in range(len(fields)):
+            self.magnetize(fields[i])
+            magnetization[i] = self.magnetization
+        return magnetization
+
+    def saturate_to_positive(self) -> None:
+        pass
+
+    def saturate_to_negative(self) -> None:
+        pass
+
+    def draw_matter_representation(self, directory) -> None:
+        pass
+
+    def prepare_matter(self, net_to_pos, pos_to_neg) -> None:
+        pass
+
+    def fingerprint(self) -> str:
+        """A stable hash of the configuration of the matter (not of its current magnetic state)"""
+        digest = hashlib.sha1()
+        self.update_fingerprint(digest)
+        return digest.hexdigest()
+
+    def update_fingerprint(self, digest) -> None:
+        digest.update(self.__class__.__name__.encode())
+        if self.interaction != 0:
+            digest.update(np.array([self.interaction], dtype=float).tobytes())
+
+    def preisach_thresholds(self) -> (tuple, None):
+        """Arrays (alpha, beta) if the matter is a plain ensemble of hysterons, otherwise None"""
+        return None
@@ -1,13 +1,13 @@
-from MagneticMatter import MagneticMatter
+from pyforc.Matter.MagneticMatter import MagneticMatter
 import numpy as np
-import matplotlib.pyplot as plt
 
-from MagneticParticle import MagneticParticle
+from pyforc.Particle.MagneticParticle import MagneticParticle
 
 
 class ManyParticlesMatter(MagneticMatter):
-    def __init__(self, particles):
+    def __init__(self, particles, interaction: float = 0.0):
         super().__init__()
+        self.interaction = interaction
         self.positive_saturation_field = -1.0
         self.negative_saturation_field = 1.0
         self.particles = particles
@@ -22,13 +22,33 @@ class ManyParticlesMatter(MagneticMatter):
 
         self.magnetization /= len(particles)
 
-    def magnetize(self, field):
+    def _magnetize_particles(self, field):
         self.magnetization = 0.0
         for i in range(len(self.particles)):
             self.particles[i].apply_field(field)
             self.magnetization += self.particles[i].magnetization
         self.magnetization /= len(self.particles)
 
+    def magnetize_sweep(self, fields):
+        if self.interaction != 0:
+            # every step depends on the magnetization after the previous one
+            return super().magnetize_sweep(fields)
+
+        magnetization = np.zeros(len(fields))
+        for i in range(len(self.particles)):
+            magnetization += self.particles[i].magnetize_sweep(fields)
+        magnetization /= len(self.particles)
+        if len(fields) > 0:
+            self.magnetization = magnetization[-1]
+        return magnetization
+
+    def save_state(self):
+        return [p.save_state() for p in self.particles]
+
+    def restore_state(self, state):
+        for p, particle_state in zip(self.particles, state):
+            p.restore_state(particle_state)
+
     def saturate_to_positive(self):
         self.magnetization = 0.0
         for i in range(len(self.particles)):
@@ -43,15 +63,31 @@ class ManyParticlesMatter(MagneticMatter):
             self.magnetization += self.particles[i].magnetization
         self.magnetization /= len(self.particles)
 
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        for i in range(len(self.particles)):
+            self.particles[i].update_fingerprint(digest)
+
+    def preisach_thresholds(self):
+        if self.interaction != 0:
+            return None
+
+        alpha = np.zeros(len(self.particles))
+        beta = np.zeros(len(self.particles))
+        for i in range(len(self.particles)):
+            thresholds = self.particles[i].preisach_thresholds()
+            if thresholds is None:
+                return None
+            alpha[i], beta[i] = thresholds
+        return alpha, beta
+
     def draw_matter_representation(self, directory):
+        import matplotlib.pyplot as plt
         hmax = self.positive_saturation_field
         hstep = 0.01
         field = np.concatenate(
             (np.arange(0.0, hmax, hstep), np.arange(hmax, -hmax, -hstep), np.arange(-hmax, hmax + hstep, hstep)))
-        magnetization = np.zeros((len(field), 1), dtype=float)
-        for i in range(len(field)):
-            self.magnetize(field[i])
-            magnetization[i] = self.magnetization
+        magnetization = self.magnetize_sweep(field)
 
         fig = plt.figure()
         ax = fig.add_subplot(111)
@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import traceback
+import weakref
+import numpy as np
+from pyforc.Matter.MagneticMatter import MagneticMatter
+
+
+class ShardedEnsembleMatter(MagneticMatter):
+    """An ensemble whose particles are split into shards, each one a matter of its own kept by a persistent worker
+    process, so that a single reversal curve of a huge ensemble is simulated on all cores
+
+    Every worker builds its shard as build(*part, **options), e.g. a SwEnsembleMatter of a slice of the easy axes,
+    and keeps its magnetic state between the calls. A field sweep is broadcast to all workers at once through a
+    shared buffer, every worker writes the magnetization of its shard along the sweep next to it, and the
+    magnetization of the ensemble is their mean weighted by the number of particles of the shards. The pipes
+    carry only the commands and the acknowledgements. A non-zero interaction is applied to the whole ensemble,
+    the shards themselves are built without it. The build callable and the parts have to be picklable where
+    processes are not forked. A sharded matter cannot be sent to other processes, so its FORC rows are simulated
+    with workers=1; call close() (or use it as a context manager) to stop the workers.
+    """
+
+    sweep_capacity = 4096  # fields broadcast at once, longer sweeps are sent in pieces
+
+    def __init__(self, build, parts: list, interaction: float = 0.0, options: dict = None):
+        super().__init__()
+        self.interaction = interaction
+        if len(parts) == 0:
+            raise Exception('A sharded ensemble needs at least one shard')
+
+        parts = [part if isinstance(part, tuple) else (part,) for part in parts]
+        self.weights = np.array([len(part[0]) for part in parts], dtype=float)
+        self.weights /= np.sum(self.weights)
+        self.thresholds = None
+        self.saved_states = 0
+
+        # row 0 holds the fields of a sweep, row 1 + i the magnetization of shard i along it
+        self.buffer = multiprocessing.RawArray('d', (len(parts) + 1) * self.sweep_capacity)
+        self.rows = np.frombuffer(self.buffer).reshape((len(parts) + 1, self.sweep_capacity))
+        self.connections = []
+        self.processes = []
+        for i in range(len(parts)):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_run_shard, daemon=True,
+                                              args=(build, parts[i], options or {}, worker_connection, self.buffer,
+                                                    i + 1, self.sweep_capacity))
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self._finalizer = weakref.finalize(self, _stop_shards, self.connections, self.processes)
+
+        try:
+            shards = self._broadcast(('describe',))
+        except Exception:
+            self.close()
+            raise
+        self.shard_fingerprints = [shard['fingerprint'] for shard in shards]
+        self.positive_saturation_field = max(shard['positive_saturation_field'] for shard in shards)
+        self.negative_saturation_field = min(shard['negative_saturation_field'] for shard in shards)
+        self.magnetization = float(np.dot(self.weights, [shard['magnetization'] for shard in shards]))
+
+    @classmethod
+    def split(cls, build, *arrays, shards: int = None, interaction: float = 0.0, **options):
+        """The arrays (e.g. psi, or alpha and beta) split into equal shards, by default one per core, each built
+        as build(*slices, **options)"""
+        shards = min(shards or os.cpu_count(), len(arrays[0]))
+        slices = [np.array_split(np.asarray(array), shards) for array in arrays]
+        return cls(build, [tuple(s[i] for s in slices) for i in range(shards)], interaction, options)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        raise Exception('A ShardedEnsembleMatter cannot be sent to another process, simulate it with workers=1')
+
+    def close(self) -> None:
+        """Stops the worker processes"""
+        self._finalizer()
+
+    def _broadcast(self, command: tuple) -> list:
+        # all workers get the command before the first answer is awaited, so the shards run in parallel
+        if not self._finalizer.alive:
+            raise Exception('The workers of this sharded ensemble are stopped')
+        for connection in self.connections:
+            connection.send(command)
+        answers = [connection.recv() for connection in self.connections]
+        for status, answer in answers:
+            if status == 'error':
+                raise Exception('A shard worker failed:\n' + answer)
+        return [answer for _, answer in answers]
+
+    def _reduce(self, n: int) -> np.ndarray:
+        return self.weights @ self.rows[1:, :n]
+
+    def _magnetize_particles(self, field):
+        self._broadcast(('magnetize', float(field)))
+        self.magnetization = float(self._reduce(1)[0])
+
+    def magnetize_sweep(self, fields):
+        if self.interaction != 0:
+            # every step depends on the magnetization after the previous one
+            return super().magnetize_sweep(fields)
+
+        fields = np.asarray(fields, dtype=float)
+        magnetization = np.zeros(len(fields))
+        for first in range(0, len(fields), self.sweep_capacity):
+            n = min(self.sweep_capacity, len(fields) - first)
+            self.rows[0, :n] = fields[first:first + n]
+            self._broadcast(('sweep', n))
+            magnetization[first:first + n] = self._reduce(n)
+        if len(fields) > 0:
+            self.magnetization = magnetization[-1]
+        return magnetization
+
+    def save_state(self):
+        # the states stay in the workers, only the last saved one is kept there
+        self.saved_states += 1
+        self._broadcast(('save_state', self.saved_states))
+        return self.saved_states
+
+    def restore_state(self, state):
+        self._broadcast(('restore_state', state))
+
+    def saturate_to_positive(self):
+        self._broadcast(('saturate', 1))
+        self.magnetization = float(self._reduce(1)[0])
+
+    def saturate_to_negative(self):
+        self._broadcast(('saturate', -1))
+        self.magnetization = float(self._reduce(1)[0])
+
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        for fingerprint in self.shard_fingerprints:
+            digest.update(fingerprint.encode())
+
+    def preisach_thresholds(self):
+        if self.interaction != 0:
+            return None
+
+        if self.thresholds is None:
+            thresholds = self._broadcast(('preisach_thresholds',))
+            if any(t is None for t in thresholds):
+                return None
+            self.thresholds = (np.concatenate([t[0] for t in thresholds]),
+                               np.concatenate([t[1] for t in thresholds]))
+        return self.thresholds
+
+
+def _stop_shards(connections: list, processes: list) -> None:
+    for connection in connections:
+        try:
+            connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join()
+    for connection in connections:
+        connection.close()
+
+
+def _run_shard(build, part: tuple, options: dict, connection, buffer, row: int, capacity: int) -> None:
+    rows = np.frombuffer(buffer).reshape((-1, capacity))
+    try:
+        matter = build(*part, **options)
+    except Exception:
+        # every command gets the error until the worker is stopped
+        error = ('error', traceback.format_exc())
+        while connection.recv() is not None:
+            connection.send(error)
+        connection.close()
+        return
+
+    saved = None
+    while True:
+        command = connection.recv()
+        if command is None:
+            break
+        try:
+            if command[0] == 'describe':
+                answer = {'fingerprint': matter.fingerprint(), 'magnetization': float(matter.magnetization),
+                          'positive_saturation_field': float(matter.positive_saturation_field),
+                          'negative_saturation_field': float(matter.negative_saturation_field)}
+            elif command[0] == 'sweep':
+                rows[row, :command[1]] = matter.magnetize_sweep(rows[0, :command[1]].copy())
+                answer = True
+            elif command[0] == 'magnetize':
+                matter.magnetize(command[1])
+                rows[row, 0] = matter.magnetization
+                answer = True
+            elif command[0] == 'saturate':
+                if command[1] > 0:
+                    matter.saturate_to_positive()
+                else:
+                    matter.saturate_to_negative()
+                rows[row, 0] = matter.magnetization
+                answer = True
+            elif command[0] == 'save_state':
+                saved = (command[1], matter.save_state())
+                answer = True
+            elif command[0] == 'restore_state':
+                if saved is None or saved[0] != command[1]:
+                    raise Exception('Only the last saved state of a shard can be restored')
+                matter.restore_state(saved[1])
+                answer = True
+            elif command[0] == 'preisach_thresholds':
+                answer = matter.preisach_thresholds()
+            else:
+                raise Exception('Unknown shard command ' + str(command[0]))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+            continue
+        connection.send(('ok', answer))
+    connection.close()
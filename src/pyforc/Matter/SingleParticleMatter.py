@@ -1,5 +1,6 @@
-from MagneticMatter import MagneticMatter
-from MagneticParticle import MagneticParticle
+from pyforc.Matter.MagneticMatter import MagneticMatter
+from pyforc.Particle.MagneticParticle import MagneticParticle
+import numpy as np
 
 
 class SingleParticleMatter(MagneticMatter):
@@ -17,6 +18,11 @@ class SingleParticleMatter(MagneticMatter):
         self.particle.apply_field(field)
         self.magnetization = self.particle.magnetization
 
+    def magnetize_sweep(self, fields):
+        magnetization = self.particle.magnetize_sweep(fields)
+        self.magnetization = self.particle.magnetization
+        return magnetization
+
     def saturate_to_positive(self):
         self.particle.set_up()
         self.magnetization = self.particle.magnetization
@@ -30,3 +36,13 @@ class SingleParticleMatter(MagneticMatter):
 
     def prepare_matter(self, net_to_pos, pos_to_neg):
         self.particle.prepare_particle(net_to_pos, pos_to_neg)
+
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        self.particle.update_fingerprint(digest)
+
+    def preisach_thresholds(self):
+        thresholds = self.particle.preisach_thresholds()
+        if thresholds is None:
+            return None
+        return np.array([thresholds[0]], dtype=float), np.array([thresholds[1]], dtype=float)
@@ -0,0 +1,139 @@
+from pyforc.Matter.MagneticMatter import MagneticMatter
+from pyforc.Particle.SwParticle import SwParticle, sw_equilibrium_angles, sw_refine_angles, sw_switching_field
+import numpy as np
+
+
+class SwEnsembleMatter(MagneticMatter):
+    """Stoner-Wohlfarth particles stored as arrays, solved all at once at every field step
+
+    Every particle follows SwParticle: the branch changes at the astroid switching field, the equilibrium angle
+    is refined by Newton steps warm-started from the last one and seeded by a coarse scan where that fails.
+    With solver='table' the magnetization is looked up in a SwResponseTable instead. A non-zero interaction
+    couples the particles by the mean field k * magnetization.
+    """
+
+    def __init__(self, psi, solver: str = 'newton', table=None, interaction: float = 0.0):
+        super().__init__()
+        self.interaction = interaction
+
+        psi = np.asarray(psi, dtype=float)
+        if psi.ndim != 1 or len(psi) == 0:
+            raise Exception('Psi should be a non-empty one-dimensional array')
+
+        if solver not in ('newton', 'table'):
+            raise Exception('The solver should be one of: newton, table')
+
+        if solver == 'table' and table is None:
+            raise Exception('The table solver needs a SwResponseTable')
+
+        self.solver = solver
+        self.table = table
+
+        self.psi = np.where((np.abs(psi) / np.pi) % 2 == 1, np.pi, np.mod(np.abs(psi), np.pi))
+        self.switching_field = sw_switching_field(psi)
+        self.last_phi = psi.copy()
+        self.last_branch = np.where(psi <= np.pi / 2, 1, -1).astype(np.int8)
+        self.phi_valid = np.ones(len(psi), dtype=bool)  # whether last_phi is the minimum of the current branch
+        self.particle_magnetization = np.cos(psi)
+
+        self.positive_saturation_field = 1.5
+        self.negative_saturation_field = -1.5
+        self.magnetization = np.mean(self.particle_magnetization)
+
+    @classmethod
+    def from_particles(cls, particles, table=None):
+        solver = 'table' if table is not None else 'newton'
+        matter = cls([p.psi for p in particles], solver, table)
+        matter.switching_field[:] = [p.switching_field for p in particles]
+        matter.last_phi[:] = [p.last_phi for p in particles]
+        matter.last_branch[:] = [p.last_branch for p in particles]
+        matter.phi_valid[:] = [p.last_phi_branch == p.last_branch for p in particles]
+        matter.particle_magnetization[:] = [p.magnetization for p in particles]
+        matter.magnetization = np.mean(matter.particle_magnetization)
+        return matter
+
+    @classmethod
+    def random(cls, n: int, seed: int = None, solver: str = 'newton', table=None):
+        """n particles with the easy axes uniformly distributed over [0, pi)"""
+        return cls(np.random.RandomState(seed).uniform(0, np.pi, n), solver, table)
+
+    def _magnetize_particles(self, field):
+        self.last_branch[field >= self.switching_field] = 1
+        self.last_branch[field <= -self.switching_field] = -1
+
+        m = np.full(len(self.psi), np.nan)
+        if self.solver == 'table':
+            m = self.table.magnetization(self.psi, self.switching_field, self.last_branch, field)
+            # the angle is not tracked by the table, a later Newton solution starts afresh
+            self.phi_valid[~np.isnan(m)] = False
+
+        unsolved = np.isnan(m)
+        if np.any(unsolved):
+            m[unsolved] = self._solve(np.nonzero(unsolved)[0], field)
+
+        self.particle_magnetization = m
+        self.magnetization = np.mean(m)
+
+    def _solve(self, indices: np.ndarray, field: float) -> np.ndarray:
+        psi = self.psi[indices]
+        branch = self.last_branch[indices]
+        start = np.where((branch == 1) == (psi < np.pi / 2), 0.0, -np.pi)
+        end = start + np.pi
+
+        phi = np.full(len(indices), np.nan)
+        last_phi = self.last_phi[indices]
+        warm = self.phi_valid[indices] & (start <= last_phi) & (last_phi < end)
+        if np.any(warm):
+            phi[warm] = sw_refine_angles(psi[warm], field, last_phi[warm], SwParticle.newton_tolerance,
+                                         SwParticle.newton_max_iterations)
+
+        seed = ~((start <= phi) & (phi < end))
+        if np.any(seed):
+            phi[seed] = sw_equilibrium_angles(psi[seed], field, start[seed], SwParticle.newton_tolerance,
+                                              SwParticle.newton_max_iterations, SwParticle.seed_points)
+
+        found = ~np.isnan(phi)
+        self.last_phi[indices[found]] = phi[found]
+        self.phi_valid[indices] = found
+        return np.where(found, np.cos(phi), branch)
+
+    def save_state(self):
+        return self.last_phi.copy(), self.last_branch.copy(), self.phi_valid.copy()
+
+    def restore_state(self, state):
+        self.last_phi[:], self.last_branch[:], self.phi_valid[:] = state
+
+    def saturate_to_positive(self):
+        # saturation erases the history, so the solver starts afresh instead of from the last angles
+        self.phi_valid.fill(False)
+        self.magnetize(self.positive_saturation_field)
+
+    def saturate_to_negative(self):
+        self.phi_valid.fill(False)
+        self.magnetize(self.negative_saturation_field)
+
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        digest.update(self.psi.tobytes())
+        digest.update(self.switching_field.tobytes())
+        digest.update(self.solver.encode())
+        if self.table is not None:
+            self.table.update_fingerprint(digest)
+
+    def draw_matter_representation(self, directory):
+        import matplotlib.pyplot as plt
+        hmax = self.positive_saturation_field
+        hstep = 0.01
+        field = np.concatenate(
+            (np.arange(0.0, hmax, hstep), np.arange(hmax, -hmax, -hstep), np.arange(-hmax, hmax + hstep, hstep)))
+        magnetization = self.magnetize_sweep(field)
+
+        fig = plt.figure()
+        ax = fig.add_subplot(111)
+        ax.plot(field, magnetization)
+        ax.set_xlabel("h")
+        ax.set_ylabel("m")
+        ax.set_title("m(h) of Stoner-Wohlfarth ensemble (n=" + str(len(self.psi)) + ")")
+        ax.grid(which='both')
+        ax.set_aspect('equal')
+        plt.show()
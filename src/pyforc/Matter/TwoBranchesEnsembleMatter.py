@@ -0,0 +1,112 @@
+from pyforc.Matter.MagneticMatter import MagneticMatter
+import numpy as np
+
+
+class TwoBranchesEnsembleMatter(MagneticMatter):
+    """Non-interacting two-branch particles sharing the branch data of one particle, with own switching fields
+
+    The branch data is kept once, in the template particle; the switching fields and the branches of the
+    particles are arrays. Every particle follows AbstractTwoBranchesParticle.apply_field, and as all of them see
+    the same field, each branch is interpolated once per field step. A non-zero interaction couples the
+    particles by the mean field k * magnetization.
+    """
+
+    def __init__(self, template, upper_to_bottom_switching_fields, bottom_to_upper_switching_fields,
+                 interaction: float = 0.0):
+        super().__init__()
+        self.interaction = interaction
+
+        self.template = template
+        self.upper_to_bottom_switching_field = np.asarray(upper_to_bottom_switching_fields, dtype=float)
+        self.bottom_to_upper_switching_field = np.asarray(bottom_to_upper_switching_fields, dtype=float)
+
+        if (self.upper_to_bottom_switching_field.shape != self.bottom_to_upper_switching_field.shape or
+                self.upper_to_bottom_switching_field.ndim != 1 or len(self.upper_to_bottom_switching_field) == 0):
+            raise Exception('The switching fields should be non-empty one-dimensional arrays of the same length')
+
+        self.branch = np.ones(len(self.upper_to_bottom_switching_field), dtype=np.int8)
+        self.last_applied_field = 0
+
+        self.positive_saturation_field = template.positive_saturation_field
+        self.negative_saturation_field = template.negative_saturation_field
+        self.magnetization = template.magnetization
+
+    @classmethod
+    def from_particles(cls, particles):
+        template = particles[0]
+        for p in particles:
+            if not (np.array_equal(p.upper_branch, template.upper_branch) and
+                    np.array_equal(p.bottom_branch, template.bottom_branch)):
+                raise Exception('The particles of the ensemble should share the branch data')
+
+        matter = cls(template, [p.upper_to_bottom_switching_field for p in particles],
+                     [p.bottom_to_upper_switching_field for p in particles])
+        matter.branch[:] = [p.branch for p in particles]
+        matter.last_applied_field = template.last_applied_field
+        matter.magnetization = np.mean([p.magnetization for p in particles])
+        return matter
+
+    def _switch(self, field) -> float:
+        """Updates the branches of the particles at the field and returns the fraction of them on the upper one"""
+        applied_field = np.abs(field)
+
+        if self.last_applied_field * field < 0:
+            self.branch.fill(1)
+
+        self.branch[applied_field > self.upper_to_bottom_switching_field] = -1
+        self.branch[applied_field < self.bottom_to_upper_switching_field] = 1
+        self.last_applied_field = field
+        return np.count_nonzero(self.branch == 1) / len(self.branch)
+
+    def _magnetize_particles(self, field):
+        upper_fraction = self._switch(field)
+        upper, bottom = self.template.branch_magnetization(np.array([1, -1]), np.abs(field))
+        self.magnetization = upper * upper_fraction + bottom * (1 - upper_fraction)
+        if field < 0:
+            self.magnetization = -self.magnetization
+
+    def magnetize_sweep(self, fields):
+        if self.interaction != 0:
+            # every step depends on the magnetization after the previous one
+            return super().magnetize_sweep(fields)
+
+        # the branches are interpolated for all fields at once, only the switching goes step by step
+        fields = np.asarray(fields, dtype=float)
+        applied_field = np.abs(fields)
+        upper = self.template.branch_magnetization(1, applied_field)
+        bottom = self.template.branch_magnetization(-1, applied_field)
+        upper_fraction = np.array([self._switch(field) for field in fields])
+        magnetization = upper * upper_fraction + bottom * (1 - upper_fraction)
+        magnetization[fields < 0] = -magnetization[fields < 0]
+        if len(fields) > 0:
+            self.magnetization = magnetization[-1]
+        return magnetization
+
+    def save_state(self):
+        return self.branch.copy(), self.last_applied_field
+
+    def restore_state(self, state):
+        self.branch[:] = state[0]
+        self.last_applied_field = state[1]
+
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        digest.update(np.ascontiguousarray(self.template.upper_branch, dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(self.template.bottom_branch, dtype=float).tobytes())
+        digest.update(self.upper_to_bottom_switching_field.tobytes())
+        digest.update(self.bottom_to_upper_switching_field.tobytes())
+
+    def draw_matter_representation(self, directory):
+        import matplotlib.pyplot as plt
+        h = np.concatenate(
+            (np.arange(0, 1, 0.01), np.arange(1, 0, -0.01), np.arange(0, -1, -0.01), np.arange(-1, 0.01, 0.01)))
+        magnetization = self.magnetize_sweep(h)
+
+        fig = plt.figure()
+        ax = fig.add_subplot(111)
+        ax.plot(h, magnetization)
+        ax.set_xlabel("h")
+        ax.set_ylabel("m")
+        ax.set_title("m(h) of two-branch particle ensemble (n=" + str(len(self.branch)) + ")")
+        ax.grid(which='both')
+        plt.show()
@@ -1,7 +1,6 @@
-from MagneticParticle import MagneticParticle
+from pyforc.Particle.MagneticParticle import MagneticParticle
+from pyforc.Particle.BranchDataCache import BranchDataCache
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.interpolate import interp1d
 
 
 class AbstractTwoBranchesParticle(MagneticParticle):
@@ -12,16 +11,9 @@ class AbstractTwoBranchesParticle(MagneticParticle):
         self.upper_to_bottom_switching_field = upper_to_bottom_switching_field
         self.bottom_to_upper_switching_field = bottom_to_upper_switching_field
 
-        data = np.loadtxt(path_to_data_file, skiprows=1)
-        upper_branch = data[data[:, 0] == 1]
-        bottom_branch = data[data[:, 0] == -1]
-        self.upper_branch = upper_branch[upper_branch[:, 1].argsort()]
-        self.bottom_branch = bottom_branch[bottom_branch[:, 1].argsort()]
+        self.path_to_data_file = path_to_data_file
+        self.upper_branch, self.bottom_branch = BranchDataCache.load(path_to_data_file)
 
-        self.interpolated_upper_magnetization = interp1d(self.upper_branch[:, 1], self.upper_branch[:, 2])
-        self.interpolated_bottom_magnetization = interp1d(self.bottom_branch[:, 1], self.bottom_branch[:, 2])
-        self.interpolated_upper_distance = interp1d(self.upper_branch[:, 1], self.upper_branch[:, 4])
-        self.interpolated_bottom_distance = interp1d(self.bottom_branch[:, 1], self.bottom_branch[:, 4])
         self.min_data_field_upper = np.min(self.upper_branch[:, 1])
         self.max_data_field_upper = np.max(self.upper_branch[:, 1])
         self.min_data_field_bottom = np.min(self.bottom_branch[:, 1])
@@ -51,7 +43,7 @@ class AbstractTwoBranchesParticle(MagneticParticle):
                                  self.upper_branch[(len(self.upper_branch) - 1), 1] - self.upper_branch[
                                      (len(self.upper_branch) - 2), 1])
 
-        self.upper_saturation_magnetization = lambda h: a_upper_saturation + h * b_upper_saturation
+        self.upper_saturation_coefficients = (a_upper_saturation, b_upper_saturation)
 
         len_bottom_data = len(self.bottom_branch)
         a_bottom_saturation = (self.bottom_branch[len_bottom_data - 1, 2] * self.bottom_branch[len_bottom_data - 2, 1] -
@@ -65,21 +57,66 @@ class AbstractTwoBranchesParticle(MagneticParticle):
                                   self.bottom_branch[(len(self.bottom_branch) - 1), 1] - self.bottom_branch[
                                       (len(self.bottom_branch) - 2), 1])
 
-        self.bottom_saturation_magnetization = lambda h: a_bottom_saturation + h * b_bottom_saturation
+        self.bottom_saturation_coefficients = (a_bottom_saturation, b_bottom_saturation)
 
         self.branch = 1
         self.last_applied_field = 0
 
+    def __getstate__(self):
+        # a worker process reopens the shared branch data instead of receiving a copy of it
+        state = self.__dict__.copy()
+        state['upper_branch'] = None
+        state['bottom_branch'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.upper_branch, self.bottom_branch = BranchDataCache.load(self.path_to_data_file)
+
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        digest.update(np.array([self.upper_to_bottom_switching_field, self.bottom_to_upper_switching_field],
+                               dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(self.upper_branch, dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(self.bottom_branch, dtype=float).tobytes())
+
+    # Linear interpolation of the branch data with np.interp, which is cheap on scalars and keeps the results
+    # plain floats. Fields beyond the data take the value at the nearest end.
+    def interpolated_upper_magnetization(self, h):
+        return np.interp(h, self.upper_branch[:, 1], self.upper_branch[:, 2])
+
+    def interpolated_bottom_magnetization(self, h):
+        return np.interp(h, self.bottom_branch[:, 1], self.bottom_branch[:, 2])
+
+    def interpolated_upper_distance(self, h):
+        return np.interp(h, self.upper_branch[:, 1], self.upper_branch[:, 4])
+
+    def interpolated_bottom_distance(self, h):
+        return np.interp(h, self.bottom_branch[:, 1], self.bottom_branch[:, 4])
+
+    def branch_magnetization(self, branch, applied_field):
+        """m on the given branches at the absolute values of the fields, before the sign of the field is applied"""
+        upper = np.where(applied_field < self.min_data_field_upper, self.upper_chi_zero * applied_field,
+                         self.interpolated_upper_magnetization(applied_field))
+        bottom = np.where(applied_field > self.max_data_field_bottom,
+                          self.bottom_saturation_magnetization(applied_field),
+                          self.interpolated_bottom_magnetization(applied_field))
+        return np.where(branch == 1, upper, bottom)
+
+    def upper_saturation_magnetization(self, h):
+        return self.upper_saturation_coefficients[0] + h * self.upper_saturation_coefficients[1]
+
+    def bottom_saturation_magnetization(self, h):
+        return self.bottom_saturation_coefficients[0] + h * self.bottom_saturation_coefficients[1]
+
     def _prepare_plot(self):
+        import matplotlib.pyplot as plt
         fig = plt.figure()
         ax = fig.add_subplot(111)
 
         h = np.concatenate(
             (np.arange(0, 1, 0.01), np.arange(1, 0, -0.01), np.arange(0, -1, -0.01), np.arange(-1, 0.01, 0.01)))
-        m = np.zeros([len(h), 1])
-        for i in range(len(h)):
-            self.apply_field(h[i])
-            m[i] = self.magnetization
+        m = self.magnetize_sweep(h)
 
         ax.plot(h, m)
         ax.set_xlabel("h")
@@ -88,6 +125,7 @@ class AbstractTwoBranchesParticle(MagneticParticle):
         ax.set_title('m(h) - interpolated')
 
     def _prepare_four_plots(self):
+        import matplotlib.pyplot as plt
         f, axarr = plt.subplots(2, 3)
 
         axarr[0, 0].plot(self.upper_branch[:, 1], self.upper_branch[:, 2])
@@ -123,10 +161,7 @@ class AbstractTwoBranchesParticle(MagneticParticle):
 
         h = np.concatenate(
             (np.arange(0, 1, 0.01), np.arange(1, 0, -0.01), np.arange(0, -1, -0.01), np.arange(-1, 0.01, 0.01)))
-        m = np.zeros([len(h), 1])
-        for i in range(len(h)):
-            self.apply_field(h[i])
-            m[i] = self.magnetization
+        m = self.magnetize_sweep(h)
 
         axarr[0, 2].plot(h, m)
         axarr[0, 2].set_xlabel("h")
@@ -134,6 +169,26 @@ class AbstractTwoBranchesParticle(MagneticParticle):
         axarr[0, 2].grid(axis='both')
         axarr[0, 2].set_title('m(h) - Via applied field')
 
+    def magnetize_sweep(self, fields: np.ndarray) -> np.ndarray:
+        fields = np.asarray(fields, dtype=float)
+        if len(fields) == 0:
+            return np.zeros(0)
+
+        applied_field = np.abs(fields)
+        previous_fields = np.concatenate(([self.last_applied_field], fields[:-1]))
+        events = np.where(applied_field < self.bottom_to_upper_switching_field, 1,
+                          np.where(applied_field > self.upper_to_bottom_switching_field, -1,
+                                   np.where(previous_fields * fields < 0, 1, 0)))
+        branches = self._hold_last_event(events, self.branch)
+
+        magnetization = self.branch_magnetization(branches, applied_field)
+        magnetization[fields < 0] = -magnetization[fields < 0]
+
+        self.branch = int(branches[-1])
+        self.last_applied_field = fields[-1]
+        self.magnetization = magnetization[-1]
+        return magnetization
+
     def apply_field(self, field_value: float):
 
         if field_value < 0:
@@ -154,13 +209,13 @@ class AbstractTwoBranchesParticle(MagneticParticle):
             if applied_field < self.min_data_field_upper:
                 self.magnetization = self.upper_chi_zero * applied_field
             else:
-                self.magnetization = self.interpolated_upper_magnetization(applied_field)
+                self.magnetization = float(self.interpolated_upper_magnetization(applied_field))
 
         if self.branch == -1:
             if applied_field > self.max_data_field_bottom:
-                self.magnetization = self.bottom_saturation_magnetization(applied_field)
+                self.magnetization = float(self.bottom_saturation_magnetization(applied_field))
             else:
-                self.magnetization = self.interpolated_bottom_magnetization(applied_field)
+                self.magnetization = float(self.interpolated_bottom_magnetization(applied_field))
 
         if field_value < 0:
             self.magnetization = -self.magnetization
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import numpy as np
+
+
+class BranchDataCache:
+    """Branch data files of two-branch particles, parsed once per process and shared read-only
+
+    A parsed file is also stored in a binary sidecar <data file>.<key>.npy next to it, where the key hashes the
+    size and the modification time of the text file. Later processes open the sidecar memory-mapped instead of
+    parsing the text again. The sidecar holds the upper branch rows followed by the bottom branch rows, each
+    sorted by the field.
+    """
+
+    branches = {}  # (upper_branch, bottom_branch) by the absolute path and key of the data file
+
+    @classmethod
+    def load(cls, path_to_data_file: str) -> tuple:
+        path = os.path.abspath(path_to_data_file)
+        status = os.stat(path)
+        key = hashlib.sha1((str(status.st_size) + ':' + str(status.st_mtime_ns)).encode()).hexdigest()[:16]
+        if (path, key) in cls.branches:
+            return cls.branches[(path, key)]
+
+        sidecar_path = path + '.' + key + '.npy'
+        data = None
+        if os.path.exists(sidecar_path):
+            try:
+                data = np.load(sidecar_path, mmap_mode='r')
+            except (OSError, ValueError):
+                data = None
+
+        if data is None:
+            data = cls._parse(path)
+            cls._save_sidecar(path, sidecar_path, data)
+            data.flags.writeable = False
+
+        upper_count = int(np.count_nonzero(data[:, 0] == 1))
+        cls.branches[(path, key)] = (data[:upper_count], data[upper_count:])
+        return cls.branches[(path, key)]
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.branches.clear()
+
+    @staticmethod
+    def _parse(path: str) -> np.ndarray:
+        data = np.loadtxt(path, skiprows=1)
+        upper_branch = data[data[:, 0] == 1]
+        bottom_branch = data[data[:, 0] == -1]
+        return np.concatenate((upper_branch[upper_branch[:, 1].argsort()],
+                               bottom_branch[bottom_branch[:, 1].argsort()]))
+
+    @staticmethod
+    def _save_sidecar(path: str, sidecar_path: str, data: np.ndarray) -> None:
+        try:
+            # sidecars of earlier versions of the file are stale
+            directory, name = os.path.split(path)
+            for other in os.listdir(directory):
+                if other.startswith(name + '.') and other.endswith('.npy') and len(other) == len(name) + 21:
+                    os.remove(os.path.join(directory, other))
+
+            temporary_path = sidecar_path + '.' + str(os.getpid()) + '.tmp'
+            with open(temporary_path, 'wb') as f:
+                np.save(f, data)
+            os.replace(temporary_path, sidecar_path)
+        except OSError:
+            # a read-only data folder only costs later processes the parsing
+            pass
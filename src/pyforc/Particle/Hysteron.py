@@ -1,6 +1,5 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from MagneticParticle import MagneticParticle
+from pyforc.Particle.MagneticParticle import MagneticParticle
 
 
 class Hysteron(MagneticParticle):
@@ -20,6 +19,12 @@ class Hysteron(MagneticParticle):
         self.positive_saturation_field = (a + (a - b) / 2)
         self.negative_saturation_field = (b - (a - b) / 2)
 
+    def save_state(self):
+        return self.magnetization
+
+    def restore_state(self, state):
+        self.magnetization = state
+
     def set_up(self):
         self.magnetization = 1
 
@@ -33,13 +38,21 @@ class Hysteron(MagneticParticle):
         if field_value < self.beta:
             self.magnetization = -1
 
+    def magnetize_sweep(self, fields: np.ndarray) -> np.ndarray:
+        fields = np.asarray(fields, dtype=float)
+        if len(fields) == 0:
+            return np.zeros(0)
+
+        events = np.where(fields > self.alpha, 1, np.where(fields < self.beta, -1, 0))
+        magnetization = self._hold_last_event(events, self.magnetization).astype(float)
+        self.magnetization = int(magnetization[-1])
+        return magnetization
+
     def _prepare_plot(self):
+        import matplotlib.pyplot as plt
         t = np.arange(0, 2 * np.pi, 0.01)
         input = -(self.alpha - self.beta) * np.cos(t) + (self.alpha + self.beta) / 2
-        output = np.zeros(len(t))
-        for i in range(len(t)):
-            self.apply_field(input[i])
-            output[i] = self.magnetization
+        output = self.magnetize_sweep(input)
 
         plt.plot(input, output, 'b-.')
         plt.grid()
@@ -50,3 +63,10 @@ class Hysteron(MagneticParticle):
 
     def prepare_particle(self, neg_to_pos, pos_to_neg):
         pass
+
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        digest.update(np.array([self.alpha, self.beta], dtype=float).tobytes())
+
+    def preisach_thresholds(self):
+        return self.alpha, self.beta
@@ -0,0 +1,70 @@
+import os
+import datetime
+import numpy as np
+
+
+class MagneticParticle:
+    mu0 = 1.2566e-06
+
+    def __init__(self):
+        self.magnetization = .0
+        self.positive_saturation_field = .0
+        self.negative_saturation_field = .0
+
+    def apply_field(self, field_value: float) -> None:
+        pass
+
+    def magnetize_sweep(self, fields: np.ndarray) -> np.ndarray:
+        """Applies the fields one after another and returns the magnetization after each of them"""
+        magnetization = np.zeros(len(fields))
+        for i in range(len(fields)):
+            self.apply_field(fields[i])
+            magnetization[i] = self.magnetization
+        return magnetization
+
+    @staticmethod
+    def _hold_last_event(events: np.ndarray, initial) -> np.ndarray:
+        # the state after each step of a sweep: the last non-zero event so far, or the initial state
+        index = np.where(events != 0, np.arange(len(events)), -1)
+        np.maximum.accumulate(index, out=index)
+        return np.where(index >= 0, events[index], initial)
+
+    def save_state(self):
+        """The magnetic state of the particle, to be put back by restore_state"""
+        return self.__dict__.copy()
+
+    def restore_state(self, state) -> None:
+        self.__dict__.update(state)
+
+    def set_up(self) -> None:
+        pass
+
+    def set_down(self) -> None:
+        pass
+
+    def draw(self, directory: str) -> None:
+        import matplotlib.pyplot as plt
+        self._prepare_plot()
+        self.save_current_plot(directory)
+        plt.show()
+
+    def _prepare_plot(self) -> None:
+        pass
+
+    def prepare_particle(self, neg_to_pos, pos_to_neg) -> None:
+        pass
+
+    def update_fingerprint(self, digest) -> None:
+        """Feeds the class and the configuration of the particle to a hashlib digest"""
+        digest.update(self.__class__.__name__.encode())
+
+    def preisach_thresholds(self) -> (tuple, None):
+        return None
+
+    def save_current_plot(self, directory):
+        import matplotlib.pyplot as plt
+        folder_for_this_class = os.path.join(directory, self.__class__. __name__)
+        if not os.path.exists(folder_for_this_class):
+            os.makedirs(folder_for_this_class)
+
+        plt.savefig(os.path.join(folder_for_this_class, datetime.datetime.now().strftime("%H_%M_%S") + '.png'))
@@ -0,0 +1,391 @@
+import math
+from pyforc.Particle.MagneticParticle import MagneticParticle
+import numpy as np
+
+
+def sw_switching_field(psi):
+    """The astroid switching field of Stoner-Wohlfarth particles with the easy axes at the angles psi"""
+    t = np.cbrt(np.tan(psi))
+    return np.sqrt(1 - t ** 2 + t ** 4) / (1 + t ** 2)
+
+
+def sw_equilibrium_angles(psi, h, start, tolerance: float = 1e-12, max_iterations: int = 100,
+                          seed_points: int = 64) -> np.ndarray:
+    """Energy minima on the half-circles [start, start + pi) for arrays of easy axis angles, fields and starts
+
+    Every minimum is bracketed by a coarse scan of dE/dphi and refined by Newton steps that fall back to
+    bisection whenever they leave the bracket. NaN marks half-circles without an interior minimum.
+    """
+    psi, h, start = np.broadcast_arrays(np.asarray(psi, dtype=float), np.asarray(h, dtype=float),
+                                        np.asarray(start, dtype=float))
+    psi = psi[..., None]
+    h = h[..., None]
+
+    x = start[..., None] + np.linspace(0, np.pi, seed_points + 1)
+    derivative = -0.5 * np.sin(2.0 * (psi - x)) + h * np.sin(x)
+    sign_change = (derivative[..., :-1] < 0) & (derivative[..., 1:] > 0)
+    found = np.any(sign_change, axis=-1)
+    first_change = np.argmax(sign_change, axis=-1)[..., None]
+    left = np.take_along_axis(x, first_change, axis=-1)
+    right = np.take_along_axis(x, first_change + 1, axis=-1)
+    psi, h = psi[..., 0], h[..., 0]
+    left, right = left[..., 0], right[..., 0]
+
+    phi = right.copy()
+    active = found.copy()
+    for _ in range(max_iterations):
+        double_angle = 2.0 * (psi - phi)
+        first = -0.5 * np.sin(double_angle) + h * np.sin(phi)
+        second = np.cos(double_angle) + h * np.cos(phi)
+
+        left = np.where(first < 0, phi, left)
+        right = np.where(first > 0, phi, right)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new_phi = phi - first / second
+        bisect = (second <= 0) | ~((left <= new_phi) & (new_phi <= right))
+        new_phi = np.where(bisect, 0.5 * (left + right), new_phi)
+        new_phi = np.where(first == 0, phi, new_phi)
+
+        converged = np.abs(new_phi - phi) < tolerance
+        phi = np.where(active, new_phi, phi)
+        active &= ~converged
+        if not np.any(active):
+            break
+
+    return np.where(found, phi, np.nan)
+
+
+def sw_refine_angles(psi, h, phi, tolerance: float = 1e-12, max_iterations: int = 100) -> np.ndarray:
+    """Energy minima reached from the angles phi by the safeguarded Newton steps of SwParticle, batched
+
+    NaN marks starting angles that are not in a convex well of the energy or do not converge.
+    """
+    psi, h, phi = np.broadcast_arrays(np.asarray(psi, dtype=float), np.asarray(h, dtype=float),
+                                      np.asarray(phi, dtype=float))
+    phi = phi.copy()
+    third_derivative_bound = 2.0 + np.abs(h)
+    left = np.full(phi.shape, np.nan)
+    right = np.full(phi.shape, np.nan)
+    failed = np.zeros(phi.shape, dtype=bool)
+    active = np.ones(phi.shape, dtype=bool)
+    for _ in range(max_iterations):
+        double_angle = 2.0 * (psi - phi)
+        first = -0.5 * np.sin(double_angle) + h * np.sin(phi)
+        second = np.cos(double_angle) + h * np.cos(phi)
+        active &= ~((first == 0) & (second >= 0))
+
+        left = np.where(active & (first < 0), phi, left)
+        right = np.where(active & (first >= 0), phi, right)
+        bracketed = ~np.isnan(left) & ~np.isnan(right)
+        failed |= active & (second <= 0) & ~bracketed
+        active &= ~failed
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(second > 0, -first / second, np.inf)
+            limit = 0.5 * second / third_derivative_bound
+            new_phi = np.where(bracketed, phi + step, phi + np.clip(step, -limit, limit))
+            new_phi = np.where(bracketed & ~((left <= new_phi) & (new_phi <= right)), 0.5 * (left + right), new_phi)
+
+        converged = np.abs(new_phi - phi) < tolerance
+        phi = np.where(active, new_phi, phi)
+        active &= ~converged
+        if not np.any(active):
+            break
+
+    failed |= active & ~(~np.isnan(left) & ~np.isnan(right))
+    return np.where(failed, np.nan, phi)
+
+
+class SwParticle(MagneticParticle):
+    critical_angle = 76.72 * np.pi / 180  # the angle at which the branches begin to intersect
+    solvers = ('newton', 'grid', 'table')
+    newton_tolerance = 1e-12
+    newton_max_iterations = 100
+    seed_points = 64
+
+    def __init__(self, psi_in_radians: float, solver: str = 'newton', table=None):
+        super().__init__()
+
+        if solver not in self.solvers:
+            raise Exception('The solver should be one of: ' + ', '.join(self.solvers))
+
+        if solver == 'table' and table is None:
+            raise Exception('The table solver needs a SwResponseTable')
+
+        self.solver = solver
+        self.table = table
+
+        if (np.abs(psi_in_radians) / np.pi) % 2 ==1:
+            self.psi = np.pi
+        else:
+            self.psi = np.mod(np.abs(psi_in_radians), np.pi)
+
+        self.last_phi = psi_in_radians
+        self.last_branch = 1 if psi_in_radians<=np.pi/2 else -1
+        self.last_phi_branch = self.last_branch
+        self.last_applied_field = 0
+        self.magnetization = np.cos(psi_in_radians)
+
+        self.switching_field = sw_switching_field(psi_in_radians)
+        self.positive_saturation_field = 1.5
+        self.negative_saturation_field = -1.5
+
+    def update_fingerprint(self, digest):
+        super().update_fingerprint(digest)
+        digest.update(np.array([self.psi, self.switching_field], dtype=float).tobytes())
+        digest.update(self.solver.encode())
+        if self.table is not None:
+            self.table.update_fingerprint(digest)
+
+    def set_up(self):
+        # saturation erases the history, so the solver starts afresh instead of from the last angle
+        self.last_phi_branch = 0
+        self.apply_field(self.positive_saturation_field)
+
+    def set_down(self):
+        self.last_phi_branch = 0
+        self.apply_field(self.negative_saturation_field)
+
+    def apply_field(self, field_value: float):
+        if field_value >= self.switching_field:
+            self.last_branch = 1
+        elif field_value <= -self.switching_field:
+            self.last_branch = -1
+
+        if self.solver == 'grid':
+            self.magnetization = self.cos_search(field_value)
+        elif self.solver == 'table':
+            self.magnetization = self.table_search(field_value)
+        else:
+            self.magnetization = self.newton_search(field_value)
+        self.last_applied_field = field_value
+
+    def magnetize_sweep(self, fields: np.ndarray) -> np.ndarray:
+        if self.solver == 'grid':
+            return super().magnetize_sweep(fields)
+
+        fields = np.asarray(fields, dtype=float)
+        if len(fields) == 0:
+            return np.zeros(0)
+
+        events = np.where(fields >= self.switching_field, 1, np.where(fields <= -self.switching_field, -1, 0))
+        branches = self._hold_last_event(events, self.last_branch)
+        if self.solver == 'table':
+            return self._table_sweep(fields, branches)
+
+        start = np.where((branches == 1) == (self.psi < np.pi / 2), 0.0, -np.pi)
+        phi = sw_equilibrium_angles(self.psi, fields, start, self.newton_tolerance, self.newton_max_iterations,
+                                    self.seed_points)
+
+        # Close to the switching field the two extrema of the branch may fall into one cell of the coarse scan,
+        # such points are solved one by one, warm-started from the preceding point of the sweep
+        for i in np.nonzero(np.isnan(phi))[0]:
+            if i > 0:
+                self.last_phi = phi[i - 1]
+                self.last_phi_branch = branches[i - 1] if not np.isnan(phi[i - 1]) else 0
+            self.last_branch = branches[i]
+            angle = self._equilibrium_angle(fields[i])
+            if angle is not None:
+                phi[i] = angle
+
+        magnetization = np.where(np.isnan(phi), branches, np.cos(phi))
+
+        self.last_branch = int(branches[-1])
+        self.last_applied_field = fields[-1]
+        self.magnetization = magnetization[-1]
+        if not np.isnan(phi[-1]):
+            self.last_phi = phi[-1]
+            self.last_phi_branch = self.last_branch
+        return magnetization
+
+    def _table_sweep(self, fields: np.ndarray, branches: np.ndarray) -> np.ndarray:
+        magnetization = self.table.magnetization(self.psi, self.switching_field, branches, fields)
+
+        # fields beyond the table are solved exactly, warm-started only from the preceding point of the sweep
+        beyond = np.isnan(magnetization)
+        for i in np.nonzero(beyond)[0]:
+            if i == 0 or not beyond[i - 1]:
+                self.last_phi_branch = 0
+            self.last_branch = branches[i]
+            magnetization[i] = self.newton_search(fields[i])
+
+        self.last_branch = int(branches[-1])
+        self.last_applied_field = fields[-1]
+        self.magnetization = magnetization[-1]
+        if not beyond[-1]:
+            self.last_phi_branch = 0
+        return magnetization
+
+    def _search_interval_start(self) -> float:
+        # the minimum of the current branch lies on the half-circle [start, start + pi)
+        if (self.last_branch == 1) == (self.psi < np.pi / 2):
+            return 0.0
+        return -np.pi
+
+    def cos_search(self, h):
+        """Reference solver: the first local minimum of the energy on a fixed 0.001 rad grid"""
+        from scipy.signal import argrelmin
+        start = self._search_interval_start()
+        x = np.arange(start, start + np.pi, 0.001)
+
+        energy = lambda phi: 0.5 * np.sin(self.psi - phi) ** 2 - h * np.cos(phi)
+
+        indices = argrelmin(energy(x))
+
+        if len(indices[0])==0:
+            return self.last_branch
+        else:
+            return np.cos(x[indices[0][0]])
+
+    def table_search(self, h):
+        """Interpolated lookup in the precomputed SwResponseTable, the Newton solver for fields beyond it"""
+        m = float(self.table.magnetization(self.psi, self.switching_field, self.last_branch, h))
+        if np.isnan(m):
+            return self.newton_search(h)
+
+        # the angle is not tracked by the table, a later Newton solution starts afresh
+        self.last_phi_branch = 0
+        return m
+
+    def newton_search(self, h):
+        """Safeguarded Newton minimization of the energy, warm-started from the last equilibrium angle
+
+        The current minimum disappears exactly when the field passes the switching field, which
+        apply_field checks analytically by changing the branch. The stored angle then belongs to the other
+        branch and the iteration is seeded by a coarse scan of dE/dphi over the new half-circle instead.
+        """
+        phi = self._equilibrium_angle(h)
+        if phi is None:
+            return self.last_branch
+
+        self.last_phi = phi
+        self.last_phi_branch = self.last_branch
+        return math.cos(phi)
+
+    def _equilibrium_angle(self, h: float) -> (float, None):
+        start = self._search_interval_start()
+        end = start + np.pi
+
+        phi = None
+        if self.last_phi_branch == self.last_branch and start <= self.last_phi < end:
+            phi = self._newton_iterations(self.last_phi, h, None, None)
+
+        if phi is None or not start <= phi < end:
+            phi = self._seed_minimum(h, start)
+        return phi
+
+    def _seed_minimum(self, h: float, start: float) -> (float, None):
+        x = start + np.linspace(0, np.pi, self.seed_points + 1)
+        derivative = -0.5 * np.sin(2.0 * (self.psi - x)) + h * np.sin(x)
+        indices = np.nonzero((derivative[:-1] < 0) & (derivative[1:] > 0))[0]
+        if len(indices) == 0:
+            return None
+
+        i = indices[0]
+        return self._newton_iterations(x[i + 1], h, x[i], x[i + 1])
+
+    def _newton_iterations(self, phi: float, h: float, left: (float, None), right: (float, None)) -> (float, None):
+        # E(phi) = sin(psi - phi)**2 / 2 - h * cos(phi). Until the minimum is bracketed by a sign change of
+        # dE/dphi, a step is limited so that d2E/dphi2 can at most halve (|d3E/dphi3| <= 2 + |h|), i.e. the
+        # iterate never leaves the convex well it started in.
+        third_derivative_bound = 2.0 + abs(h)
+        psi = self.psi
+
+        for _ in range(self.newton_max_iterations):
+            double_angle = 2.0 * (psi - phi)
+            first = -0.5 * math.sin(double_angle) + h * math.sin(phi)
+            second = math.cos(double_angle) + h * math.cos(phi)
+            if first == 0 and second >= 0:
+                return phi
+
+            if first < 0:
+                left = phi
+            else:
+                right = phi
+
+            if second <= 0:
+                if left is None or right is None:
+                    return None
+                step = np.inf
+            else:
+                step = -first / second
+
+            if left is not None and right is not None:
+                new_phi = phi + step
+                if not left <= new_phi <= right:
+                    new_phi = 0.5 * (left + right)
+            else:
+                limit = 0.5 * second / third_derivative_bound
+                new_phi = phi + max(-limit, min(limit, step))
+
+            if abs(new_phi - phi) < self.newton_tolerance:
+                return new_phi
+            phi = new_phi
+
+        if left is not None and right is not None:
+            return phi
+        return None
+
+    def _prepare_plot(self):
+        import matplotlib.pyplot as plt
+        hmax = self.positive_saturation_field
+        hstep = 0.01
+        field = np.concatenate(
+            (np.arange(0, hmax, hstep), np.arange(hmax, -hmax, -hstep), np.arange(-hmax, hmax + hstep, hstep)))
+        magnetization = self.magnetize_sweep(field)
+
+        fig = plt.figure()
+        ax = fig.add_subplot(111)
+        ax.plot(field, magnetization)
+        ax.set_title("Hyseresis of the Stoner-Wohlfarth particle at $\psi$ =" + str(
+            np.round(self.psi / np.pi * 180)) + "$^\circ$" + " SwField=" + str(np.round(self.switching_field, 2)))
+
+        self._draw_rectangular_border(ax)
+        self._draw_axes(ax)
+        ax.set_aspect(aspect='equal')
+
+    def _draw_rectangular_border(self, ax: 'plt.Axes'):
+        max_magnetization = 1.0
+        field_of_one = 1.0
+        stepy = np.abs(max_magnetization / 10.0)
+        border_yy = np.arange(-max_magnetization, max_magnetization + stepy, stepy)
+        border_yx_rt = field_of_one * np.ones((len(border_yy), 1))
+        border_yx_lt = -field_of_one * np.ones((len(border_yy), 1))
+
+        stepx = np.abs(field_of_one / 10.0)
+        border_xx = np.arange(-field_of_one, field_of_one + stepx, stepx)
+        border_xy_up = max_magnetization * np.ones((len(border_xx), 1))
+        border_xy_dn = -max_magnetization * np.ones((len(border_xx), 1))
+        ax.plot(border_yx_rt, border_yy, '-.r',
+                border_yx_lt, border_yy, '-.r',
+                border_xx, border_xy_up, '-.r',
+                border_xx, border_xy_dn, '-.r')
+
+    def _draw_axes(self, ax: 'plt.Axes'):
+        ax.grid(which='both')
+        max_magn = 1.0
+        max_field = 2.0
+
+        stepy = np.abs(max_magn / 10)
+        zero_yy = np.arange(-max_magn - stepy, max_magn + 2 * stepy, stepy)
+        zero_yx = np.zeros((len(zero_yy), 1))
+
+        stepx = np.abs(max_field / 10)
+        zero_xx = np.arange(-max_field - stepx, max_field + 2 * stepx, stepx)
+        zero_xy = np.zeros((len(zero_xx), 1))
+
+        ax.plot(zero_yx, zero_yy, '--k', zero_xx, zero_xy, '--k')
+        ax.set_ylim(np.min(zero_yy), np.max(zero_yy))
+        ax.set_xlim(np.min(zero_xx), np.max(zero_xx))
+
+    def draw_astroid(self):
+        import matplotlib.pyplot as plt
+        fig = plt.figure()
+        ax = fig.add_subplot(111)
+        theta = np.arange(-np.pi, np.pi, 0.0001)
+        x = np.cos(theta) ** 3
+        y = np.sin(theta) ** 3
+        ax.plot(x, y)
+        ax.grid(which='both')
+        plt.show()
@@ -0,0 +1,117 @@
+import os
+from pyforc.Particle.SwParticle import SwParticle, sw_equilibrium_angles, sw_switching_field
+import numpy as np
+
+
+class SwResponseTable:
+    """Precomputed magnetization of Stoner-Wohlfarth particles on both branches over a (psi, h) grid
+
+    Only the upper branch (last_branch == 1) for psi in [0, pi/2] is stored, the rest follows by symmetry:
+    m(psi, -1, h) = -m(psi, 1, -h) and m(pi - psi, b, h) = m(psi, b, h). The rows are spaced uniformly in
+    theta = arctan(cbrt(tan(psi))), in which the astroid switching field hs is smooth up to the easy and hard axes.
+    Column j holds the field h = -hs + (max_field + hs) * u_j ** 2 with u_j = j / (n_u - 1), so that the fold of
+    the branch at h = -hs lies on the first column of every row and m is smooth in u close to it. Values are
+    interpolated bilinearly in (theta, u).
+
+    With the default 451 x 1001 grid the interpolated magnetization differs from the Newton solver of SwParticle
+    by less than 3e-5 for |h| <= max_field, except within about 1 deg of the hard axis at |h| close to 1, where m
+    bends sharply towards saturation and the difference reaches 1.5e-4. The error falls as the square of the grid
+    steps.
+    """
+
+    tables = {}  # tables already loaded or built in this process, by path and parameters
+
+    def __init__(self, values: np.ndarray, max_field: float):
+        self.values = values
+        self.max_field = max_field
+        self.n_psi, self.n_u = values.shape
+        self.theta_step = np.pi / 2 / (self.n_psi - 1)
+
+    @classmethod
+    def build(cls, n_psi: int = 451, n_u: int = 1001, max_field: float = 3.0):
+        psi = np.arctan(np.tan(np.linspace(0, np.pi / 2, n_psi)) ** 3)
+        u = np.linspace(0, 1, n_u)
+        switching_field = sw_switching_field(psi)
+
+        values = np.empty((n_psi, n_u))
+        rows_per_block = max(1, 2 ** 22 // (n_u * (SwParticle.seed_points + 1)))
+        for first in range(0, n_psi, rows_per_block):
+            rows = slice(first, first + rows_per_block)
+            h = -switching_field[rows, None] + (max_field + switching_field[rows, None]) * u ** 2
+            # the minima of the upper branch lie in [0, pi) up to and including the hard axis, which is taken
+            # in the limit psi -> pi/2 - 0 as for the rest of the table
+            values[rows] = np.cos(sw_equilibrium_angles(psi[rows, None], h, 0.0))
+
+        # Next to the fold the coarse scan may miss the minimum, such points are solved by the particle itself,
+        # warm-started from the neighbouring point at the higher field
+        for i in np.unique(np.nonzero(np.isnan(values))[0]):
+            particle = SwParticle(min(psi[i], np.nextafter(np.pi / 2, 0)))
+            particle.last_branch = 1
+            for j in range(n_u - 1, -1, -1):
+                if not np.isnan(values[i, j]):
+                    continue
+                h = -switching_field[i] + (max_field + switching_field[i]) * u[j] ** 2
+                if j + 1 < n_u:
+                    particle.last_phi = np.arccos(np.clip(values[i, j + 1], -1, 1))
+                    particle.last_phi_branch = 1
+                phi = particle._equilibrium_angle(h)
+                if phi is not None:
+                    values[i, j] = np.cos(phi)
+                elif j == 0:
+                    # the fold itself, where the minimum degenerates into an inflection point
+                    values[i, 0] = 2 * values[i, 1] - values[i, 2]
+                else:
+                    values[i, j] = particle.last_branch
+        return cls(values, max_field)
+
+    @classmethod
+    def load_or_build(cls, path: str = None, n_psi: int = 451, n_u: int = 1001, max_field: float = 3.0):
+        """The table stored at path (built and saved there first if there is none), shared within the process"""
+        key = (path, n_psi, n_u, max_field)
+        if key in cls.tables:
+            return cls.tables[key]
+
+        table = None
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                if data['values'].shape == (n_psi, n_u) and float(data['max_field']) == max_field:
+                    table = cls(data['values'], max_field)
+
+        if table is None:
+            table = cls.build(n_psi, n_u, max_field)
+            if path is not None:
+                temporary_path = path + '.' + str(os.getpid()) + '.tmp.npz'
+                np.savez(temporary_path, values=table.values, max_field=max_field)
+                os.replace(temporary_path, path)
+
+        cls.tables[key] = table
+        return table
+
+    def update_fingerprint(self, digest) -> None:
+        digest.update(np.array([self.n_psi, self.n_u, self.max_field], dtype=float).tobytes())
+
+    def magnetization(self, psi, switching_field, branch, h) -> np.ndarray:
+        """Interpolated m on the given branches, NaN for fields beyond +-max_field
+
+        psi is taken in [0, pi] and the branch is expected to exist at h, i.e. h > -switching_field on the upper
+        branch and h < switching_field on the bottom one, as SwParticle.apply_field ensures.
+        """
+        psi, switching_field, branch, h = np.broadcast_arrays(np.asarray(psi, dtype=float),
+                                                              np.asarray(switching_field, dtype=float),
+                                                              np.asarray(branch), np.asarray(h, dtype=float))
+        sign = np.where(branch < 0, -1.0, 1.0)
+        h = sign * h
+
+        u = np.sqrt(np.clip((h + switching_field) / (self.max_field + switching_field), 0, 1))
+        x = np.arctan(np.cbrt(np.abs(np.tan(psi)))) / self.theta_step
+        y = u * (self.n_u - 1)
+
+        i = np.minimum(x.astype(int), self.n_psi - 2)
+        j = np.minimum(y.astype(int), self.n_u - 2)
+        dx = x - i
+        dy = y - j
+
+        values = self.values
+        m = ((1 - dx) * ((1 - dy) * values[i, j] + dy * values[i, j + 1]) +
+             dx * ((1 - dy) * values[i + 1, j] + dy * values[i + 1, j + 1]))
+        return np.where(h <= self.max_field, sign * m, np.nan)
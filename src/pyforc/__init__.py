@@ -0,0 +1,46 @@
+"""Simulation of first order reversal curves (FORC) of magnetic particles and ensembles
+
+The classes are importable from the package itself, e.g. ``from pyforc import PikeFORC``. They are loaded on
+first access, so ``import pyforc`` costs nothing beyond NumPy; matplotlib and scipy are imported only by the
+methods that draw, save .mat files, refine adaptively or run the reference SW solver.
+"""
+import importlib
+
+_modules = {
+    'MagneticParticle': 'pyforc.Particle.MagneticParticle',
+    'Hysteron': 'pyforc.Particle.Hysteron',
+    'SwParticle': 'pyforc.Particle.SwParticle',
+    'SwResponseTable': 'pyforc.Particle.SwResponseTable',
+    'AbstractTwoBranchesParticle': 'pyforc.Particle.AbstractTwoBranchesParticle',
+    'MagneticMatter': 'pyforc.Matter.MagneticMatter',
+    'SingleParticleMatter': 'pyforc.Matter.SingleParticleMatter',
+    'ManyParticlesMatter': 'pyforc.Matter.ManyParticlesMatter',
+    'HysteronEnsembleMatter': 'pyforc.Matter.HysteronEnsembleMatter',
+    'SwEnsembleMatter': 'pyforc.Matter.SwEnsembleMatter',
+    'ShardedEnsembleMatter': 'pyforc.Matter.ShardedEnsembleMatter',
+    'TwoBranchesEnsembleMatter': 'pyforc.Matter.TwoBranchesEnsembleMatter',
+    'PikeFORC': 'pyforc.ExperimentProcessor.PikeFORC',
+    'PackedForcGrid': 'pyforc.ExperimentProcessor.PackedForcGrid',
+    'ForcCache': 'pyforc.ExperimentProcessor.ForcCache',
+    'ForcRenderer': 'pyforc.ExperimentProcessor.ForcRenderer',
+    'ForcResultsFile': 'pyforc.ExperimentProcessor.ForcResultsFile',
+    'AdaptiveForcRefinement': 'pyforc.ExperimentProcessor.AdaptiveForcRefinement',
+    'ForcSweep': 'pyforc.ExperimentProcessor.ForcSweep',
+    'ForcSweepStore': 'pyforc.ExperimentProcessor.ForcSweepStore',
+    'MagnetizationCurve': 'pyforc.Experiment.MagnetizationCurve',
+    'MeasuredForcData': 'pyforc.Experiment.MeasuredForcData',
+}
+
+__all__ = sorted(_modules)
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError("module 'pyforc' has no attribute '{}'".format(name))
+    value = getattr(importlib.import_module(_modules[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from pyforc.ExperimentProcessor.PikeFORC import PikeFORC
+from pyforc.Matter.HysteronEnsembleMatter import HysteronEnsembleMatter
+
+
+def _hysteron_forc(directory) -> PikeFORC:
+    rs = np.random.RandomState(0)
+    alpha = rs.normal(0.3, 0.2, 2000)
+    beta = alpha - np.abs(rs.normal(0.5, 0.2, 2000))
+    forc = PikeFORC(1.0, -0.5, 0.5, HysteronEnsembleMatter(alpha, beta), str(directory), N=31, SF=2,
+                    instrument=True)
+    forc.magnetization_forc()
+    return forc
+
+
+def _per_point_distribution(forc: PikeFORC) -> np.ndarray:
+    p = np.full((len(forc.Hr), len(forc.H)), np.nan)
+    for i in range(len(forc.Hr)):
+        for j in range(len(forc.H)):
+            if forc.H[j] >= forc.Hr[i]:
+                p[i, j] = forc._get_local_forc_distribution(i, j)
+    return p
+
+
+@pytest.mark.parametrize('blank_rows', [False, True])
+def test_batched_fits_match_per_point_fits(tmp_path, blank_rows):
+    forc = _hysteron_forc(tmp_path)
+    if blank_rows:
+        # windows left with two reversal curves cannot fit hr**2 and take the least-squares fallback
+        rows = np.arange(1, len(forc.Hr), 3)
+        forc.write_magnetization_rows(rows, np.full((len(rows), len(forc.H)), np.nan))
+
+    forc.calculate_forc_distribution()
+    counts = dict(forc.instrumentation.counts)
+    expected = _per_point_distribution(forc)
+
+    assert counts['batched surface fits'] > 0
+    assert counts['lstsq surface fits'] > 0
+    np.testing.assert_array_equal(np.isnan(forc.PgridHHr), np.isnan(expected))
+    scale = np.nanmax(np.abs(expected))
+    np.testing.assert_allclose(np.nan_to_num(forc.PgridHHr) / scale, np.nan_to_num(expected) / scale, rtol=0,
+                               atol=1e-10)